@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .buffers import ShardedCounter, increment_or_create
+from .models import Advertisement, AdStatHour
+from .visits import hour_bucket
+
+EVENTS = ('impressions', 'clicks')
+
+
+def flush_ad_events(counts):
+    """Applies buffered ``{(ad_id, hour, event): count}`` to the hourly rows."""
+    per_hour = defaultdict(dict)
+    for (ad_id, hour, event), count in counts.items():
+        per_hour[ad_id, hour][event] = count
+
+    live = set(Advertisement.objects.filter(pk__in={ad_id for ad_id, _ in per_hour}).values_list('pk', flat=True))
+    with transaction.atomic():
+        for (ad_id, hour), events in per_hour.items():
+            if ad_id in live:
+                increment_or_create(AdStatHour, {'ad_id': ad_id, 'hour': hour}, events)
+
+
+ad_event_counter = ShardedCounter(flush_ad_events, interval=getattr(settings, 'AD_STATS_FLUSH_INTERVAL', 5))
+
+
+def record_ad_event(ad_id, event):
+    ad_event_counter.add((ad_id, hour_bucket(timezone.now()), event))
+
+
+def ad_report(start, end, ad_id=None):
+    """
+    Impression/click totals in ``[start, end)`` from the hourly rows: per hour
+    for one ad, or per ad across all of them.
+    """
+    rows = AdStatHour.objects.filter(hour__gte=hour_bucket(start), hour__lt=end)
+    if ad_id is not None:
+        rows = rows.filter(ad_id=ad_id).values('hour').order_by('hour')
+    else:
+        rows = rows.values('ad_id', 'ad__title').order_by('ad_id')
+    rows = list(rows.annotate(impressions_sum=Sum('impressions'), clicks_sum=Sum('clicks')))
+
+    impressions = sum(row['impressions_sum'] for row in rows)
+    clicks = sum(row['clicks_sum'] for row in rows)
+    breakdown = [
+        {
+            **({'hour': row['hour']} if ad_id is not None else {'ad': row['ad_id'], 'title': row['ad__title']}),
+            'impressions': row['impressions_sum'],
+            'clicks': row['clicks_sum'],
+            'ctr': click_through_rate(row['impressions_sum'], row['clicks_sum']),
+        }
+        for row in rows
+    ]
+    return {
+        'impressions': impressions,
+        'clicks': clicks,
+        'ctr': click_through_rate(impressions, clicks),
+        ('hourly' if ad_id is not None else 'ads'): breakdown,
+    }
+
+
+def click_through_rate(impressions, clicks):
+    return round(clicks / impressions, 4) if impressions else 0.0
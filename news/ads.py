@@ -0,0 +1,131 @@
+import random
+import threading
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .cache_versions import bump_on_commit, get_version
+from .models import Advertisement
+from .serializers import AdvertisementSerializer
+
+VERSION_KEY = 'news:ads:version'
+AD_SPACES = frozenset(space for space, _ in Advertisement.AD_SPACES)
+
+
+def current_version():
+    # Shared through the cache so a save in one process reaches every worker.
+    return get_version(VERSION_KEY)
+
+
+def invalidate():
+    bump_on_commit(VERSION_KEY)
+
+
+def active_ads(space, today):
+    ads = Advertisement.objects.filter(is_active=True, start_date__lte=today, end_date__gte=today)
+    if space:
+        ads = ads.filter(ad_space=space)
+    return ads.order_by('created_at')
+
+
+def load_active_ads(space, today):
+    return list(AdvertisementSerializer(active_ads(space, today), many=True).data)
+
+
+class AliasTable:
+    """
+    Vose's alias method: after O(n) setup, each ``pick`` is one random index
+    and one coin flip, however many ads compete for the slot.
+    """
+
+    def __init__(self, items, weights):
+        n = len(items)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        self.items = items
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+        # Whatever is left is 1 up to rounding error and keeps prob 1.
+
+    def pick(self, rng=random):
+        i = rng.randrange(len(self.items))
+        return self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]]
+
+
+class AdSnapshot:
+    """The serialized active ads of one ad space (or of all of them), by category."""
+
+    def __init__(self, ads):
+        self.ads = ads
+        self.by_category = defaultdict(list)
+        for ad in ads:
+            self.by_category[ad['category']].append(ad)
+        self.tables = {
+            category: self.alias_table(category_ads)
+            for category, category_ads in [(None, ads), *self.by_category.items()]
+        }
+
+    @staticmethod
+    def alias_table(ads):
+        eligible = [ad for ad in ads if ad['weight'] > 0]
+        if not eligible:
+            return None
+        return AliasTable(eligible, [ad['weight'] for ad in eligible])
+
+    def for_category(self, category=None):
+        return self.by_category.get(category, []) if category else self.ads
+
+    def choose(self, category=None):
+        """One ad, picked with probability proportional to its weight.
+
+        Falls back to the whole space when nothing targets ``category``;
+        returns ``None`` when the space has nothing to serve.
+        """
+        table = self.tables.get(category) or self.tables[None]
+        return table.pick() if table else None
+
+
+class AdCache:
+    """
+    Per-process snapshots of the ads that are live right now.
+
+    A snapshot is built from the database the first time a space is asked
+    for, and reused until an ad is saved or deleted (the shared version
+    moves) or the date changes, so ads start and stop on the right day
+    without anyone touching them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._snapshots = {}
+
+    def get(self, space=None):
+        """Snapshot for ``space`` (``None`` = every space); raises ValueError for unknown spaces."""
+        if space is not None and space not in AD_SPACES:
+            raise ValueError(f"Unknown ad space: {space}")
+        today = timezone.now().date()
+        stamp = (current_version(), today)
+        with self._lock:
+            if self._stamp != stamp:
+                self._stamp, self._snapshots = stamp, {}
+            snapshots = self._snapshots
+
+        snapshot = snapshots.get(space)
+        if snapshot is None:
+            # Built against the stamp read above: if an ad changes meanwhile,
+            # the next request sees a new stamp and discards this dict.
+            snapshot = snapshots[space] = AdSnapshot(load_active_ads(space, today))
+        return snapshot
+
+
+ad_cache = AdCache()
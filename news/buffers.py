@@ -0,0 +1,105 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedCounter:
+    """
+    In-process write-behind counter.
+
+    ``add`` only touches one shard's dict under that shard's lock, so hot keys
+    on different shards never contend. A daemon thread hands the accumulated
+    counts to ``flush_func`` every ``interval`` seconds and once more at
+    interpreter exit. Counts that are being flushed stay visible through
+    ``pending`` until ``flush_func`` returns, and are put back if it raises.
+    """
+
+    def __init__(self, flush_func, shards=16, interval=5):
+        self.flush_func = flush_func
+        self.interval = interval
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._inflight = {}
+        self._flush_lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._pid = None
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def add(self, key, amount=1):
+        self._ensure_flusher()
+        counts, lock = self._shard(key)
+        with lock:
+            counts[key] = counts.get(key, 0) + amount
+            buffered = counts[key]
+        return buffered + self._inflight.get(key, 0)
+
+    def pending(self, key):
+        counts, lock = self._shard(key)
+        with lock:
+            buffered = counts.get(key, 0)
+        return buffered + self._inflight.get(key, 0)
+
+    def flush(self):
+        with self._flush_lock:
+            drained = {}
+            for counts, lock in self._shards:
+                with lock:
+                    swapped = dict(counts)
+                    counts.clear()
+                for key, amount in swapped.items():
+                    drained[key] = drained.get(key, 0) + amount
+            if not drained:
+                return
+            self._inflight = drained
+            try:
+                self.flush_func(drained)
+            except Exception:
+                logger.exception("Counter flush failed; keeping %d keys for the next attempt", len(drained))
+                for key, amount in drained.items():
+                    counts, lock = self._shard(key)
+                    with lock:
+                        counts[key] = counts.get(key, 0) + amount
+            finally:
+                self._inflight = {}
+
+    def _ensure_flusher(self):
+        # Threads do not survive a fork, so a pre-forking server gets a fresh
+        # flusher in every worker process.
+        if self._pid == os.getpid():
+            return
+        with self._thread_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, daemon=True).start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.interval):
+            close_old_connections()
+            self.flush()
+
+
+def increment_or_create(model, lookup, amounts):
+    """
+    Adds ``amounts`` ({field: n}) to the row matching ``lookup``, creating it
+    with exactly ``amounts`` the first time. Used by the flush functions.
+    """
+    rows = model.objects.filter(**lookup)
+    increments = {field: F(field) + amount for field, amount in amounts.items()}
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **amounts)
+    except IntegrityError:
+        # Another process created the row between our UPDATE and INSERT.
+        rows.update(**increments)
@@ -0,0 +1,163 @@
+import csv
+import json
+import uuid
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.utils.dateparse import parse_date, parse_time
+
+from .constants import DEFAULT_IMAGE, normalize_category
+from .models import NewsPost
+from .search import refresh_search_vectors
+
+REQUIRED_FIELDS = ["header", "content", "date", "time", "source", "share_link", "main_category"]
+TEXT_FIELDS = ["header", "image", "source", "share_link", "sub_category"]
+# Taken from the model so a column change cannot let an over-long value
+# through to bulk_create, where it would fail the whole batch.
+MAX_LENGTHS = {name: NewsPost._meta.get_field(name).max_length for name in TEXT_FIELDS}
+MAX_REPORTED_ERRORS = 20
+
+validate_url = URLValidator()
+
+
+def read_rows(path, input_format):
+    """Yields ``(line_number, row_dict)`` from an NDJSON or CSV file, one row at a time."""
+    with open(path, encoding="utf-8", newline="") as source:
+        if input_format == "csv":
+            # Line 1 is the header row.
+            for number, row in enumerate(csv.DictReader(source), start=2):
+                yield number, row
+            return
+        for number, line in enumerate(source, start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, f"invalid JSON: {e}"
+
+
+def clean_row(row):
+    """
+    Returns the NewsPost field values for one raw row, or raises ValueError.
+
+    Covers what would make the insert fail or store junk (required fields,
+    column lengths, date/time/URL/UUID formats, known categories), checked
+    with plain Python so a batch of rows costs no serializer machinery.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(row if isinstance(row, str) else "row is not an object")
+
+    missing = [name for name in REQUIRED_FIELDS if not str(row.get(name) or "").strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    for name, limit in MAX_LENGTHS.items():
+        if len(str(row.get(name) or "")) > limit:
+            raise ValueError(f"{name} is longer than {limit} characters")
+
+    date = parse_date(str(row["date"]))
+    time = parse_time(str(row["time"]))
+    if date is None or time is None:
+        raise ValueError("date must be YYYY-MM-DD and time HH:MM[:SS]")
+    category = normalize_category(row["main_category"])
+    if category is None:
+        raise ValueError(f"unknown main_category {row['main_category']!r}")
+    try:
+        validate_url(row["share_link"])
+        if row.get("image"):
+            validate_url(row["image"])
+        post_id = uuid.UUID(str(row["id"])) if row.get("id") else uuid.uuid4()
+        views = int(row.get("views") or 0)
+    except (ValidationError, ValueError, TypeError):
+        raise ValueError("share_link, image, id or views is malformed")
+
+    return {
+        "id": post_id,
+        "header": str(row["header"]).strip(),
+        "content": str(row["content"]),
+        "image": row.get("image") or DEFAULT_IMAGE,
+        "date": date,
+        "time": time,
+        "source": str(row["source"]),
+        "share_link": row["share_link"],
+        "main_category": category,
+        "sub_category": str(row.get("sub_category") or ""),
+        "views": max(views, 0),
+    }
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    categories: set = field(default_factory=set)
+    errors: list = field(default_factory=list)
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.created += other.created
+        self.duplicates += other.duplicates
+        self.invalid += other.invalid
+        self.categories |= other.categories
+        self.errors.extend(other.errors[:MAX_REPORTED_ERRORS - len(self.errors)])
+
+
+def import_batch(numbered_rows):
+    """
+    Validates and stores one batch of ``(line_number, row)``.
+
+    Duplicates are dropped within the batch here and against the table by
+    insert_new_posts. Costs a handful of statements per batch.
+    """
+    result = ImportResult(rows=len(numbered_rows))
+    posts = {}
+    for number, row in numbered_rows:
+        try:
+            values = clean_row(row)
+        except ValueError as e:
+            result.invalid += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(f"line {number}: {e}")
+            continue
+        if values["share_link"] in posts:
+            result.duplicates += 1
+            continue
+        posts[values["share_link"]] = NewsPost(**values)
+
+    result.created = insert_new_posts(list(posts.values()))
+    result.duplicates += len(posts) - result.created
+    if result.created:
+        result.categories = {post.main_category for post in posts.values()}
+    return result
+
+
+def insert_new_posts(posts, batch_size=None):
+    """
+    Stores the ``posts`` whose share_link is not taken and returns how many
+    rows were created.
+
+    Known links are dropped with one share_link__in query;
+    ``ignore_conflicts`` covers rows another run or worker inserts between
+    that check and the insert. bulk_create sends no post_save, so the new
+    rows' search vectors are refreshed here; the cache side is left to
+    signals.posts_bulk_created, once per run.
+    """
+    known = set(
+        NewsPost.objects.filter(share_link__in=[post.share_link for post in posts])
+        .values_list("share_link", flat=True)
+    )
+    new_posts = [post for post in posts if post.share_link not in known]
+    if not new_posts:
+        return 0
+    NewsPost.objects.bulk_create(new_posts, batch_size=batch_size, ignore_conflicts=True)
+    # bulk_create cannot report which rows conflicted; count what is ours.
+    inserted = NewsPost.objects.filter(
+        pk__in=[post.pk for post in new_posts],
+        share_link__in=[post.share_link for post in new_posts],
+    )
+    created = inserted.count()
+    if created:
+        refresh_search_vectors(inserted)
+    return created
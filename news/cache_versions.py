@@ -0,0 +1,37 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_versions(keys):
+    """
+    Current value of each version counter in the shared cache.
+
+    Missing counters are seeded from the clock rather than 1, so one that was
+    evicted can never point back at entries built before the eviction.
+    """
+    versions = cache.get_many(keys)
+    for key in set(keys) - versions.keys():
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return versions
+
+
+def get_version(key):
+    return get_versions([key])[key]
+
+
+def bump(*keys):
+    """Moves each counter on, orphaning everything cached under its old value."""
+    for key in set(keys):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def bump_on_commit(*keys):
+    # A request rebuilding before the commit would otherwise read the old rows
+    # and store them under the new version.
+    transaction.on_commit(lambda: bump(*keys))
@@ -0,0 +1,92 @@
+import uuid
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from . import listings
+from .http_cache import invalidate_tags
+from .models import Comment, NewsPost
+
+Through = NewsPost.comments.through
+
+# Rows accepted by one call of the bulk import endpoint.
+COMMENT_IMPORT_LIMIT = 5000
+
+
+def parse_post_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        raise NewsPost.DoesNotExist("News Post Not Found")
+
+
+def recount(posts):
+    """Sets ``comment_count`` on every post in ``posts`` from the through table, in one UPDATE."""
+    counts = (
+        Through.objects.filter(newspost_id=OuterRef('pk'))
+        .order_by()
+        .values('newspost_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return posts.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+def comments_changed(post_ids):
+    # Through-model writes send no m2m_changed, so drop cached responses here.
+    invalidate_tags(*[f'post:{pk}' for pk in post_ids])
+    for pk in post_ids:
+        listings.invalidate_post(NewsPost(pk=pk))
+
+
+def add_comment(post_id, fields):
+    """
+    Creates a comment on ``post_id`` in one transaction of three statements.
+
+    The comment-count UPDATE runs first and doubles as the existence check
+    (and row lock), so a bad post ID fails before anything is inserted.
+    """
+    post_id = parse_post_id(post_id)
+    with transaction.atomic():
+        if not NewsPost.objects.filter(pk=post_id).update(comment_count=F('comment_count') + 1):
+            raise NewsPost.DoesNotExist("News Post Not Found")
+        comment = Comment.objects.create(**fields)
+        Through.objects.create(newspost_id=post_id, comment_id=comment.pk)
+    comments_changed([post_id])
+    return comment
+
+
+def import_comments(rows, batch_size=1000):
+    """
+    Bulk-creates ``[(post_id, fields), ...]``; all rows or none.
+
+    Post IDs are checked with one query for the whole batch, and the inserts
+    and count updates are set-based, so the statement count does not grow
+    with the number of rows beyond ``batch_size`` chunks.
+    Raises ``NewsPost.DoesNotExist`` naming the unknown IDs.
+    """
+    rows = [(parse_post_id(post_id), fields) for post_id, fields in rows]
+    wanted = {post_id for post_id, _ in rows}
+    found = set(NewsPost.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+    if wanted - found:
+        raise NewsPost.DoesNotExist(
+            "News Post Not Found: " + ", ".join(sorted(str(pk) for pk in wanted - found))
+        )
+
+    comments = [Comment(id=uuid.uuid4(), **fields) for _, fields in rows]
+    per_post = Counter(post_id for post_id, _ in rows)
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+        Through.objects.bulk_create([
+            Through(newspost_id=post_id, comment_id=comment.pk)
+            for (post_id, _), comment in zip(rows, comments)
+        ], batch_size=batch_size)
+        if per_post:
+            NewsPost.objects.filter(pk__in=per_post).update(comment_count=F('comment_count') + Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in per_post.items()],
+                output_field=IntegerField(),
+            ))
+    comments_changed(per_post)
+    return comments
@@ -9,4 +9,23 @@ MAIN_CATEGORIES = [
     ("Business", "Business"),
     ("Politics", "Politics"),
     
-]
\ No newline at end of file
+]
+
+CATEGORY_BY_LOWER = {value.lower(): value for value, _ in MAIN_CATEGORIES}
+
+
+def normalize_category(value):
+    """Maps any casing of a category ("sport", "SPORT") to its stored form."""
+    return CATEGORY_BY_LOWER.get((value or "").strip().lower())
+
+
+# Columns rendered by news cards (NewsPostListSerializer) and the length of
+# the content excerpt shown on them.
+NEWS_CARD_FIELDS = [
+    "id", "header", "image", "date", "time", "main_category",
+    "sub_category", "source", "share_link", "comment_count",
+]
+EXCERPT_LENGTH = 200
+
+# Stored for posts whose source offers no usable image.
+DEFAULT_IMAGE = "/image/default1.jpg"
@@ -0,0 +1,58 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .constants import normalize_category
+from .models import NewsPost
+
+EXPORT_FIELDS = [
+    "id", "header", "content", "image", "date", "time", "source", "share_link",
+    "main_category", "sub_category", "comment_count", "views",
+]
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_queryset(category=None, start=None, end=None):
+    """Plain ``values()`` rows, newest first; ``start``/``end`` dates are inclusive."""
+    posts = NewsPost.objects.order_by("-date", "-time", "id")
+    if category:
+        posts = posts.filter(main_category=normalize_category(category) or category)
+    if start:
+        posts = posts.filter(date__gte=start)
+    if end:
+        posts = posts.filter(date__lte=end)
+    return posts.values(*EXPORT_FIELDS)
+
+
+class Echo:
+    """csv.writer target that hands each formatted line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def export_lines(queryset, output="ndjson", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the export one line at a time. Rows come from a chunked iterator
+    (a server-side cursor on Postgres), so memory does not depend on how
+    many posts match.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    return csv_lines(rows) if output == "csv" else ndjson_lines(rows)
@@ -0,0 +1,140 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+
+from .cache_versions import bump_on_commit, get_versions
+from .constants import normalize_category
+
+HTTP_CACHE_TTL = getattr(settings, 'HTTP_CACHE_TTL', 300)
+
+
+def tag_key(tag):
+    return f'news:tag:{tag}'
+
+
+def tag_versions(tags):
+    """Current version of each tag; tags never seen before get one now."""
+    keys = {tag_key(tag): tag for tag in tags}
+    return {keys[key]: version for key, version in get_versions(list(keys)).items()}
+
+
+def invalidate_tags(*tags):
+    """Makes every cached response carrying any of ``tags`` stale (after commit)."""
+    bump_on_commit(*[tag_key(tag) for tag in tags])
+
+
+def etag_for(content):
+    return '"%s"' % hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def post_tags(response):
+    """``post:<id>`` for every object with an ``id`` in a (paginated) list body."""
+    data = getattr(response, 'data', None)
+    if data is None:
+        try:
+            data = json.loads(response.content)
+        except ValueError:
+            return set()
+    if isinstance(data, dict):
+        data = data.get('results', [])
+    if not isinstance(data, list):
+        return set()
+    return {f"post:{item['id']}" for item in data if isinstance(item, dict) and 'id' in item}
+
+
+def with_headers(response, etag):
+    response['ETag'] = etag
+    # Shared caches may keep the body but must revalidate it on every request.
+    response['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
+
+
+def cached_response(request, content, content_type, etag):
+    """``content`` with validators, or an empty 304 when the client already has ``etag``."""
+    if etag_matches(request, etag):
+        return with_headers(HttpResponseNotModified(), etag)
+    return with_headers(HttpResponse(content, content_type=content_type), etag)
+
+
+def cache_response(tags, tag_results=False):
+    """
+    Caches successful GET responses of a view, invalidated by tags.
+
+    ``tags(request, **kwargs)`` names what the response depends on (a post,
+    a category, a list); ``tag_results`` also tags it with every post in the
+    body. The entry remembers the version of each tag when it was built and
+    is served only while all of them are unchanged, so a signal bumping one
+    tag drops exactly the responses that mention it, on any cache backend.
+    Works around ``View.as_view()``, like Django's ``cache_page``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            static = sorted(tags(request, **kwargs))
+            key = 'news:http:' + hashlib.md5('\n'.join([
+                request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *static,
+            ]).encode()).hexdigest()
+
+            entry = cache.get(key)
+            if entry is not None and tag_versions(entry['tags']) == entry['tags']:
+                return cached_response(request, entry['content'], entry['content_type'], entry['etag'])
+
+            before = tag_versions(static)
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and callable(response.render):
+                response.render()
+            if response.status_code != 200 or not response.get('Content-Type', '').startswith('application/json'):
+                return response
+
+            etag = response.get('ETag') or etag_for(response.content)
+            versions = tag_versions(set(static) | (post_tags(response) if tag_results else set()))
+            # Something we depend on changed while the view ran: serve, don't store.
+            if all(versions[tag] == version for tag, version in before.items()):
+                cache.set(key, {
+                    'tags': versions,
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'etag': etag,
+                }, HTTP_CACHE_TTL)
+
+            if etag_matches(request, etag):
+                return with_headers(HttpResponseNotModified(), etag)
+            return with_headers(response, etag)
+        return wrapper
+    return decorator
+
+
+# --- tags of the public reads -------------------------------------------------
+
+def news_list_tags(request, **kwargs):
+    category = normalize_category(request.GET.get('category'))
+    return [f'category:{category}'] if category else ['news:list']
+
+
+def news_detail_tags(request, id, **kwargs):
+    return [f'post:{id}']
+
+
+def slot_tags(slots):
+    def tags(request, **kwargs):
+        return [f"slots:{slots.slug}"]
+    return tags
+
+
+def ad_tags(request, **kwargs):
+    # The date is part of the key, so yesterday's ad list is never served today.
+    return ['ads', f'ads:{timezone.now().date()}']
@@ -0,0 +1,393 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import feedparser
+import requests
+from bs4 import BeautifulSoup
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from newspaper import Article
+
+from .bulk_import import MAX_LENGTHS, insert_new_posts
+from .constants import DEFAULT_IMAGE
+from .models import FeedState, NewsPost
+from .signals import posts_bulk_created
+
+USER_AGENT = "Mozilla/5.0 (compatible; NaijaTalkBot/1.0)"
+SEEN_ENTRY_LIMIT = 500
+SEEN_LINK_CACHE_SIZE = 50_000
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_article_with_newspaper(url, timeout=15):
+    try:
+        article = Article(url, request_timeout=timeout, browser_user_agent=USER_AGENT)
+        article.download()
+        article.parse()
+        return article.text.strip(), article.top_image or DEFAULT_IMAGE
+    except Exception as e:
+        logger.warning("newspaper3k failed for %s: %s", url, e)
+        return "", DEFAULT_IMAGE
+
+
+def extract_image(soup):
+    img_tag = soup.find("img")
+    if img_tag and img_tag.get("src"):
+        return img_tag["src"]
+
+    og = soup.find("meta", property="og:image")
+    if og and og.get("content"):
+        return og["content"]
+
+    tw = soup.find("meta", property="twitter:image")
+    if tw and tw.get("content"):
+        return tw["content"]
+
+    return DEFAULT_IMAGE
+
+
+def entry_id(entry):
+    return entry.get("id") or entry.get("link", "")
+
+
+class HostLimiter:
+    """Caps the number of in-flight requests per host across all workers."""
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    @contextmanager
+    def __call__(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+        with semaphore:
+            yield
+
+
+class SeenLinkCache:
+    """
+    Size-bounded LRU of share_links known to be stored.
+
+    A hit means the link is definitely in the DB, so the entry can be dropped
+    without a query or a download. A miss proves nothing and falls through to
+    the batched share_link__in check. Warmed with the newest links, which are
+    the ones feeds keep re-announcing; memory stays at ``maxsize`` entries no
+    matter how large the table grows.
+    """
+
+    def __init__(self, maxsize=SEEN_LINK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._links = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def warm(self):
+        if self._warmed:
+            return
+        recent = (
+            NewsPost.objects.order_by("-date", "-time")
+            .values_list("share_link", flat=True)[:self.maxsize]
+        )
+        # Oldest first, so the newest links end up most recently used.
+        self.add_many(reversed(list(recent.iterator(chunk_size=2000))))
+        self._warmed = True
+
+    def __contains__(self, link):
+        with self._lock:
+            if link not in self._links:
+                return False
+            self._links.move_to_end(link)
+            return True
+
+    def add_many(self, links):
+        with self._lock:
+            for link in links:
+                self._links[link] = None
+                self._links.move_to_end(link)
+            while len(self._links) > self.maxsize:
+                self._links.popitem(last=False)
+
+
+# Shared by every run in the process so long-lived workers stay warm.
+seen_links = SeenLinkCache()
+
+
+@dataclass
+class IngestStats:
+    feeds_total: int = 0
+    feeds_done: int = 0
+    feeds_failed: int = 0
+    feeds_not_modified: int = 0
+    articles_created: int = 0
+    errors: int = 0
+
+
+class FeedIngestor:
+    """
+    Fetches feeds and article bodies on a bounded thread pool.
+
+    Network I/O runs on the workers; filtering, dedupe and the NewsPost
+    writes stay on the calling thread so Django's DB connection is never
+    shared between threads.
+    """
+
+    def __init__(self, sources, keywords, workers=8, per_host=2, timeout=15,
+                 deadline=600, conditional=True, batch_size=100, log=None, on_progress=None):
+        self.sources = sources
+        self.keywords = keywords
+        self.workers = workers
+        self.timeout = timeout
+        self.deadline = deadline
+        self.conditional = conditional
+        self.batch_size = batch_size
+        self.limit = HostLimiter(per_host)
+        self.log = log or (lambda message, level=None: None)
+        self.on_progress = on_progress
+        self.stats = IngestStats(feeds_total=len(sources))
+        self._queued_links = set()
+        self._unsaved = []
+
+    # --- worker side -------------------------------------------------------
+
+    def fetch_feed(self, source, state=None):
+        """
+        Returns ``(feed, etag, last_modified)``, or ``None`` when the server
+        answers our conditional GET with 304 Not Modified.
+        """
+        headers = {"User-Agent": USER_AGENT}
+        if state is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
+        with self.limit(source["rss"]):
+            response = requests.get(source["rss"], timeout=self.timeout, headers=headers)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+
+        feed = feedparser.parse(
+            response.content,
+            response_headers={"content-type": response.headers.get("Content-Type", "")},
+        )
+        return feed, response.headers.get("ETag", ""), response.headers.get("Last-Modified", "")
+
+    def fetch_article(self, url):
+        with self.limit(url):
+            return fetch_article_with_newspaper(url, timeout=self.timeout)
+
+    # --- coordinator side --------------------------------------------------
+
+    def run(self):
+        cutoff = datetime.now() - timedelta(days=1)
+        deadline_at = time.monotonic() + self.deadline
+        seen_links.warm()
+        self.states = {
+            state.rss_url: state
+            for state in FeedState.objects.filter(rss_url__in=[source["rss"] for source in self.sources])
+        }
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        pending = {
+            pool.submit(self.fetch_feed, source, self.states.get(source["rss"]) if self.conditional else None): ("feed", source)
+            for source in self.sources
+        }
+
+        try:
+            while pending:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    self.log(f"Deadline of {self.deadline}s reached, abandoning {len(pending)} pending fetches", "warning")
+                    self.stats.errors += len(pending)
+                    # Make the next poll re-read these feeds instead of getting a 304.
+                    self.expire_feed_state({
+                        (payload if kind == "feed" else payload[0])["rss"]
+                        for kind, payload in pending.values()
+                    })
+                    break
+
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, payload = pending.pop(future)
+                    if kind == "feed":
+                        for entry, published_dt in self.handle_feed(payload, future, cutoff):
+                            article_future = pool.submit(self.fetch_article, entry.link)
+                            pending[article_future] = ("article", (payload, entry, published_dt))
+                    else:
+                        self.handle_article(*payload, future)
+                    self.report_progress()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.flush()
+            self.report_progress()
+
+        return self.stats
+
+    def expire_feed_state(self, rss_urls):
+        # Makes the next poll re-read these feeds in full instead of getting
+        # a 304, so entries that were queued but never stored are retried.
+        FeedState.objects.filter(rss_url__in=rss_urls).update(etag="", last_modified="")
+
+    def report_progress(self):
+        if self.on_progress:
+            self.on_progress(self.stats)
+
+    def handle_feed(self, source, future, cutoff):
+        try:
+            result = future.result()
+        except Exception as e:
+            self.stats.feeds_failed += 1
+            self.stats.errors += 1
+            self.log(f"Failed to fetch {source['name']} (URL: {source['rss']}): {e}", "error")
+            return []
+        finally:
+            self.stats.feeds_done += 1
+
+        if result is None:
+            self.stats.feeds_not_modified += 1
+            self.log(f"⏩ Not modified since last poll: {source['name']}")
+            return []
+        feed, etag, last_modified = result
+
+        if not feed.entries:
+            self.log(f"No entries found for {source['name']} (URL: {source['rss']})", "warning")
+            return []
+
+        state = self.states.get(source["rss"])
+        seen_ids = set(state.seen_entry_ids) if state and self.conditional else set()
+
+        expected_keywords = self.keywords[source["main_category"]]
+        candidates = []
+        for entry in feed.entries:
+            if entry_id(entry) in seen_ids:
+                continue
+
+            if not any(keyword.lower() in entry.title.lower() for keyword in expected_keywords):
+                self.log(f"⏭️ Skipped unrelated article: {entry.title}")
+                continue
+
+            published_parsed = getattr(entry, 'published_parsed', None)
+            if not published_parsed:
+                continue
+            published_dt = datetime.fromtimestamp(time.mktime(published_parsed))
+            if published_dt < cutoff:
+                self.log(f"⏭️ Skipped old post: {entry.link}")
+                continue
+
+            if len(entry.link) > MAX_LENGTHS["share_link"]:
+                self.log(f"⏭️ Skipped (link longer than {MAX_LENGTHS['share_link']} characters): {entry.link}", "warning")
+                continue
+
+            candidates.append((entry, published_dt))
+
+        unknown = {entry.link for entry, _ in candidates if entry.link not in seen_links}
+        known_links = set(
+            NewsPost.objects.filter(share_link__in=unknown).values_list("share_link", flat=True)
+        ) if unknown else set()
+        seen_links.add_many(known_links)
+
+        accepted = []
+        for entry, published_dt in candidates:
+            # The same story is often syndicated into several of our feeds.
+            if entry.link not in unknown or entry.link in known_links or entry.link in self._queued_links:
+                self.log(f"⏩ Skipped (duplicate): {entry.link}")
+                continue
+
+            self._queued_links.add(entry.link)
+            accepted.append((entry, published_dt))
+
+        # Queued entries are left out of the seen list; once stored they are
+        # caught by the duplicate check instead, so a failed run retries them.
+        queued_ids = {entry_id(entry) for entry, _ in accepted}
+        self.save_feed_state(source, etag, last_modified, [
+            entry_id(entry) for entry in feed.entries if entry_id(entry) not in queued_ids
+        ])
+        return accepted
+
+    def save_feed_state(self, source, etag, last_modified, seen_ids):
+        FeedState.objects.update_or_create(
+            rss_url=source["rss"],
+            defaults={
+                "etag": etag,
+                "last_modified": last_modified,
+                "seen_entry_ids": seen_ids[:SEEN_ENTRY_LIMIT],
+                "last_polled": timezone.now(),
+            },
+        )
+
+    def handle_article(self, source, entry, published_dt, future):
+        try:
+            full_content, top_image = future.result()
+        except Exception as e:
+            self.stats.errors += 1
+            self.log(f"⚠️ Failed to fetch article {entry.link}: {e}", "error")
+            full_content, top_image = "", DEFAULT_IMAGE
+
+        published = entry.get("published", "")
+        try:
+            date_obj = datetime.strptime(published[:16], "%a, %d %b %Y")
+        except Exception:
+            date_obj = published_dt
+
+        if not full_content:
+            content_html = entry.get("content", [{}])[0].get("value", "") or entry.get("summary", "")
+            soup = BeautifulSoup(content_html, "html.parser")
+            full_content = soup.get_text(separator="\n").strip()
+            top_image = extract_image(soup)
+
+        # CDN image URLs often carry long query strings; one over-long value
+        # would fail the whole batch insert.
+        if not top_image or len(top_image) > MAX_LENGTHS["image"]:
+            top_image = DEFAULT_IMAGE
+
+        self._unsaved.append((source["rss"], NewsPost(
+            id=uuid.uuid4(),
+            header=entry.title[:MAX_LENGTHS["header"]],
+            content=full_content[:5000],
+            date=date_obj.date(),
+            time=date_obj.time(),
+            source=source["name"][:MAX_LENGTHS["source"]],
+            image=top_image,
+            share_link=entry.link,
+            main_category=source["main_category"],
+            sub_category="",
+            views=0,
+        )))
+        self.log(f"✓ Fetched: {entry.title[:60]}", "success")
+        if len(self._unsaved) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        unsaved, self._unsaved = self._unsaved, []
+        if not unsaved:
+            return
+        posts = [post for _, post in unsaved]
+
+        try:
+            with transaction.atomic():
+                created = insert_new_posts(posts, self.batch_size)
+        except DatabaseError as e:
+            self.stats.errors += len(posts)
+            self.log(f"Failed to store {len(posts)} posts: {e}", "error")
+            # Their feeds' validators were saved when the entries were queued.
+            self.expire_feed_state({rss for rss, _ in unsaved})
+            return
+        # Stored now, whether by this run or by whoever won a conflict.
+        seen_links.add_many(post.share_link for post in posts)
+        if created:
+            posts_bulk_created({post.main_category for post in posts})
+        self.stats.articles_created += created
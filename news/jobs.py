@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import FetchJob
+
+# Longer than fetch_news's default --deadline, so a live run always reports
+# progress (and so heartbeats) well inside this window.
+STALE_JOB_AFTER = timedelta(minutes=15)
+
+
+def enqueue_fetch_job(user=None):
+    return FetchJob.objects.create(requested_by=user if user and user.is_authenticated else None)
+
+
+def claim_next_job():
+    """
+    Atomically moves the oldest queued job to ``running`` and returns it.
+
+    SKIP LOCKED lets several workers poll the same table without handing the
+    same job out twice.
+    """
+    with transaction.atomic():
+        job = (
+            FetchJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def fail_stale_jobs(stale_after=STALE_JOB_AFTER):
+    """
+    Marks ``running`` jobs whose worker stopped heartbeating as ``failed``.
+
+    A worker killed mid-run (deploy, OOM, crash) never reaches the final
+    status update, so without this its job would report ``running`` forever.
+    Returns the number of jobs failed.
+    """
+    now = timezone.now()
+    cutoff = now - stale_after
+    return FetchJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status='running',
+    ).update(
+        status='failed',
+        message=f'No progress reported for {int(stale_after.total_seconds())}s; the worker presumably died.',
+        finished_at=now,
+    )
+
+
+def run_fetch_job(job, **options):
+    try:
+        call_command('fetch_news', job=str(job.id), **options)
+    except Exception as e:
+        FetchJob.objects.filter(pk=job.pk).update(
+            status='failed', message=str(e), finished_at=timezone.now()
+        )
+        raise
+    FetchJob.objects.filter(pk=job.pk).update(status='succeeded', finished_at=timezone.now())
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from . import ranking
+from .cache_versions import bump_on_commit, get_version
+from .http_cache import cached_response, etag_for
+from .serializers import NewsPostListSerializer
+
+LISTING_CACHE_TTL = getattr(settings, 'LISTING_CACHE_TTL', 60 * 60 * 24)
+
+
+def version_key(slots):
+    return f'news:listing:{slots.slug}:version'
+
+
+def current_version(slots):
+    return get_version(version_key(slots))
+
+
+def invalidate(slots):
+    bump_on_commit(version_key(slots))
+
+
+def invalidate_post(post):
+    """Drops any listing ``post`` is in now or was in when it was last built."""
+    for slots in (ranking.TOP_NEWS, ranking.TRENDING):
+        entry = cache.get(body_key(slots, current_version(slots)))
+        if getattr(post, slots.flag, False) or (entry and post.pk in entry['ids']):
+            invalidate(slots)
+
+
+def body_key(slots, version):
+    return f'news:listing:{slots.slug}:{version}'
+
+
+def build(slots):
+    posts = list(slots.members().for_listing().order_by(slots.priority))
+    body = JSONRenderer().render(NewsPostListSerializer(posts, many=True).data)
+    return {
+        'etag': etag_for(body),
+        'body': body,
+        'ids': frozenset(post.pk for post in posts),
+    }
+
+
+def materialized(slots):
+    """The serialized default listing for ``slots``, rebuilt once per version."""
+    key = body_key(slots, current_version(slots))
+    entry = cache.get(key)
+    if entry is None:
+        entry = build(slots)
+        cache.set(key, entry, LISTING_CACHE_TTL)
+    return entry
+
+
+def listing_response(request, slots):
+    entry = materialized(slots)
+    return cached_response(request, entry['body'], 'application/json', entry['etag'])
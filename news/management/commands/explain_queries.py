@@ -0,0 +1,75 @@
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from news.models import NewsPost
+from news.pagination import KeysetPagination
+from news.ads import active_ads
+from news.views import NewsPostCommentListView, NewsPostListView
+
+
+class Command(BaseCommand):
+    help = "Prints the EXPLAIN plan of the query behind every list endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true",
+                            help="Run EXPLAIN ANALYZE (Postgres only; executes the queries).")
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options = {"analyze": True, "buffers": True}
+
+        for name, queryset in self.queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write("")
+
+    def queries(self):
+        today = timezone.localdate()
+        news_pages = [
+            ("news list", "/api/news/", None),
+            ("news list, deep page", "/api/news/", [today, "00:00", uuid.UUID(int=0)]),
+            ("news list by category", "/api/news/?category=sport", None),
+            ("news list by date", f"/api/news/?date={today}", None),
+            ("news search", "/api/news/?search=election", None),
+        ]
+        for name, path, cursor in news_pages:
+            view = self.view(NewsPostListView, path)
+            paginator = KeysetPagination()
+            paginator.ordering = tuple(getattr(view, "keyset_ordering", None) or paginator.ordering)
+            queryset = view.get_queryset()
+            if cursor:
+                queryset = queryset.filter(paginator.seek(cursor, reverse=False))
+            yield name, queryset.order_by(*paginator.ordering)[:paginator.page_size + 1]
+
+        # The busiest post, where a per-post comment page costs the most.
+        post_id = NewsPost.objects.order_by("-comment_count").values_list("pk", flat=True).first()
+        if post_id is not None:
+            comment_pages = [
+                ("comments of one post", None),
+                ("comments of one post, deep page", [today, "00:00", uuid.UUID(int=0)]),
+            ]
+            for name, cursor in comment_pages:
+                view = self.view(NewsPostCommentListView, f"/api/news/{post_id}/comments/", id=post_id)
+                paginator = KeysetPagination()
+                queryset = view.get_queryset()
+                if cursor:
+                    queryset = queryset.filter(paginator.seek(cursor, reverse=False))
+                yield name, queryset.order_by(*paginator.ordering)[:paginator.page_size + 1]
+
+        yield "top news", NewsPost.objects.for_listing().top_news()
+        yield "trending news", NewsPost.objects.for_listing().trending()
+        yield "ads by space (ad cache cold path)", active_ads("home-top", timezone.now().date())
+
+    def view(self, view_class, path, **kwargs):
+        view = view_class()
+        view.request = Request(APIRequestFactory().get(path))
+        view.format_kwarg = None
+        view.kwargs = kwargs
+        view.get_queryset()  # lets the view set per-request attributes (keyset_ordering)
+        return view
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from news.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_lines, export_queryset
+
+
+class Command(BaseCommand):
+    help = "Streams posts as NDJSON or CSV to a file or stdout, in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", choices=sorted(EXPORT_FORMATS), default="ndjson")
+        parser.add_argument("--file", help="Write here instead of stdout.")
+        parser.add_argument("--category", help="Only posts in this main category.")
+        parser.add_argument("--start", help="Only posts dated on/after YYYY-MM-DD.")
+        parser.add_argument("--end", help="Only posts dated on/before YYYY-MM-DD.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE,
+                            help="Rows fetched from the database per round trip.")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ("start", "end"):
+            if options[name]:
+                try:
+                    dates[name] = parse_date(options[name])
+                except ValueError:  # well formed but impossible, e.g. 2024-02-30
+                    dates[name] = None
+                if dates[name] is None:
+                    raise CommandError(f"--{name} must be YYYY-MM-DD")
+
+        queryset = export_queryset(options["category"], **dates)
+        lines = export_lines(queryset, options["output"], options["chunk_size"])
+
+        out = open(options["file"], "w", encoding="utf-8", newline="") if options["file"] else None
+        written = 0
+        try:
+            for line in lines:
+                if out is None:
+                    self.stdout.write(line, ending="")
+                else:
+                    out.write(line)
+                written += 1
+        finally:
+            if out is not None:
+                out.close()
+
+        if options["file"]:
+            rows = written - 1 if options["output"] == "csv" else written
+            self.stderr.write(self.style.SUCCESS(f"✓ Exported {rows} posts to {options['file']}"))
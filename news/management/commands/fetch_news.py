@@ -1,12 +1,8 @@
-import feedparser
-import uuid
 import time
-import requests
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from newspaper import Article
 from django.core.management.base import BaseCommand
-from news.models import NewsPost
+from django.utils import timezone
+from news.ingest import FeedIngestor
+from news.models import FetchJob
 
 CATEGORY_KEYWORDS = {
     "Scientific": ["science", "tech", "space", "research", "climate", "innovation", "biology", "physics"],
@@ -170,91 +166,68 @@ RSS_SOURCES = [
     },
 ]
 
-def fetch_article_with_newspaper(url):
-    try:
-        article = Article(url)
-        article.download()
-        article.parse()
-        return article.text.strip(), article.top_image or "/image/default1.jpg"
-    except Exception as e:
-        print(f"⚠️ newspaper3k failed: {url}\n{e}")
-        return "", "/image/default1.jpg"
-
-def extract_image(soup):
-    img_tag = soup.find("img")
-    if img_tag and img_tag.get("src"):
-        return img_tag["src"]
-
-    og = soup.find("meta", property="og:image")
-    if og and og.get("content"):
-        return og["content"]
-
-    tw = soup.find("meta", property="twitter:image")
-    if tw and tw.get("content"):
-        return tw["content"]
-
-    return "/image/default1.jpg"
-
 class Command(BaseCommand):
     help = "Fetches latest news from RSS feeds using newspaper3k"
 
-    def handle(self, *args, **kwargs):
-        for source in RSS_SOURCES:
-            expected_keywords = CATEGORY_KEYWORDS[source["main_category"]]
-            feed = feedparser.parse(source["rss"])
-
-            if not feed.entries:
-                self.stdout.write(self.style.WARNING(
-                    f"No entries found for {source['name']} (URL: {source['rss']})"
-                ))
-                continue
-
-            cutoff = datetime.now() - timedelta(days=1)
-
-            for entry in feed.entries:
-                if not any(keyword.lower() in entry.title.lower() for keyword in expected_keywords):
-                    self.stdout.write(f"⏭️ Skipped unrelated article: {entry.title}")
-                    continue
-
-                published_parsed = getattr(entry, 'published_parsed', None)
-                if not published_parsed:
-                    continue
-                published_dt = datetime.fromtimestamp(time.mktime(published_parsed))
-                if published_dt < cutoff:
-                    self.stdout.write(f"⏭️ Skipped old post: {entry.link}")
-                    continue
-
-                if NewsPost.objects.filter(share_link=entry.link).exists():
-                    self.stdout.write(f"⏩ Skipped (duplicate): {entry.link}")
-                    continue
-
-                published = entry.get("published", "")
-                try:
-                    date_obj = datetime.strptime(published[:16], "%a, %d %b %Y")
-                except Exception:
-                    date_obj = published_dt
-
-                full_content, top_image = fetch_article_with_newspaper(entry.link)
-
-                if not full_content:
-                    content_html = entry.get("content", [{}])[0].get("value", "") or entry.get("summary", "")
-                    soup = BeautifulSoup(content_html, "html.parser")
-                    full_content = soup.get_text(separator="\n").strip()
-                    top_image = extract_image(soup)
-
-                NewsPost.objects.create(
-                    id=uuid.uuid4(),
-                    header=entry.title,
-                    content=full_content[:5000],
-                    date=date_obj.date(),
-                    time=date_obj.time(),
-                    source=source["name"],
-                    image=top_image or "/image/default1.jpg",
-                    share_link=entry.link,
-                    main_category=source["main_category"],
-                    sub_category="",
-                    views=0,
-                )
-
-                self.stdout.write(self.style.SUCCESS(f"✓ Fetched: {entry.title[:60]}"))
-
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Number of concurrent fetch threads.")
+        parser.add_argument("--per-host", type=int, default=2,
+                            help="Maximum concurrent requests to any single host.")
+        parser.add_argument("--timeout", type=int, default=15,
+                            help="Timeout in seconds for each feed or article request.")
+        parser.add_argument("--deadline", type=int, default=600,
+                            help="Give up on outstanding fetches after this many seconds.")
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Number of new posts written per bulk insert.")
+        parser.add_argument("--ignore-cache", action="store_true",
+                            help="Skip conditional GETs and re-read every feed in full.")
+        parser.add_argument("--job", help="FetchJob ID to report progress to.")
+
+    def log(self, message, level=None):
+        styles = {
+            "success": self.style.SUCCESS,
+            "warning": self.style.WARNING,
+            "error": self.style.ERROR,
+        }
+        self.stdout.write(styles[level](message) if level else message)
+
+    def report_job_progress(self, job_id, stats, force=False):
+        # Called after every fetched feed/article; keep the UPDATEs to ~1/s.
+        now = time.monotonic()
+        if not force and now - self._last_report < 1:
+            return
+        self._last_report = now
+        FetchJob.objects.filter(pk=job_id).update(
+            feeds_total=stats.feeds_total,
+            feeds_done=stats.feeds_done,
+            feeds_not_modified=stats.feeds_not_modified,
+            articles_created=stats.articles_created,
+            errors=stats.errors,
+            heartbeat_at=timezone.now(),
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        job_id = options["job"]
+        self._last_report = 0
+        ingestor = FeedIngestor(
+            RSS_SOURCES,
+            CATEGORY_KEYWORDS,
+            workers=options["workers"],
+            per_host=options["per_host"],
+            timeout=options["timeout"],
+            deadline=options["deadline"],
+            conditional=not options["ignore_cache"],
+            batch_size=options["batch_size"],
+            log=self.log,
+            on_progress=(lambda stats: self.report_job_progress(job_id, stats)) if job_id else None,
+        )
+        stats = ingestor.run()
+        if job_id:
+            self.report_job_progress(job_id, stats, force=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.monotonic() - started:.1f}s: {stats.feeds_done}/{stats.feeds_total} feeds, "
+            f"{stats.feeds_not_modified} not modified (304), {stats.articles_created} articles created, {stats.errors} errors"
+        ))
@@ -0,0 +1,83 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from news.bulk_import import ImportResult, import_batch, read_rows
+from news.signals import posts_bulk_created
+
+
+def batches(rows, size):
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Bulk-imports posts from an NDJSON or CSV archive (e.g. an export_news file)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON (one post per line) or CSV file.")
+        parser.add_argument("--input", choices=["ndjson", "csv"],
+                            help="File format; guessed from the extension by default.")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows validated, deduped and inserted together.")
+        parser.add_argument("--workers", type=int, default=0,
+                            help="Worker processes inserting batches in parallel (0 = this process).")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["input"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        rows = read_rows(path, input_format)
+        total = ImportResult()
+        started = time.monotonic()
+        self.last_report = started
+
+        try:
+            if options["workers"] > 0:
+                self.run_parallel(rows, options, total)
+            else:
+                for batch in batches(rows, options["batch_size"]):
+                    self.collect(total, import_batch(batch), started)
+        except FileNotFoundError:
+            raise CommandError(f"No such file: {path}")
+        finally:
+            if total.created:
+                # Batches refresh their own search vectors, possibly in a worker process.
+                posts_bulk_created(total.categories)
+
+        elapsed = time.monotonic() - started
+        for error in total.errors:
+            self.stdout.write(self.style.WARNING(f"⚠️ {error}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {total.rows} rows in {elapsed:.1f}s ({total.rows / max(elapsed, 1e-9):,.0f} rows/s): "
+            f"{total.created} created, {total.duplicates} duplicates, {total.invalid} invalid"
+        ))
+
+    def run_parallel(self, rows, options, total):
+        # Forked children must not share the parent's database socket; each
+        # opens its own on first use. (With fork, the pool starts every
+        # worker on the first submit, before the parent touches the DB again.)
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=options["workers"], mp_context=context) as pool:
+            pending = set()
+            for batch in batches(rows, options["batch_size"]):
+                # Keep a bounded number of batches in flight so memory stays flat.
+                if len(pending) >= options["workers"] * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.collect(total, future.result(), started)
+                pending.add(pool.submit(import_batch, batch))
+            for future in pending:
+                self.collect(total, future.result(), started)
+
+    def collect(self, total, result, started):
+        total.merge(result)
+        now = time.monotonic()
+        if now - self.last_report >= 5:
+            self.last_report = now
+            self.stdout.write(f"… {total.rows:,} rows, {total.created:,} created "
+                              f"({total.rows / (now - started):,.0f} rows/s)")
@@ -0,0 +1,39 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from news.jobs import STALE_JOB_AFTER, claim_next_job, fail_stale_jobs, run_fetch_job
+
+
+class Command(BaseCommand):
+    help = "Runs queued FetchJobs (enqueued through the fetch-news endpoint)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Exit once the queue is empty instead of polling.")
+        parser.add_argument("--poll-interval", type=float, default=5,
+                            help="Seconds to sleep between polls of an empty queue.")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Concurrent fetch threads per job.")
+        parser.add_argument("--stale-after", type=float, default=STALE_JOB_AFTER.total_seconds(),
+                            help="Fail running jobs that have not reported progress for this many seconds.")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options["stale_after"])
+        while True:
+            stale = fail_stale_jobs(stale_after)
+            if stale:
+                self.stdout.write(self.style.WARNING(f"Failed {stale} stale running job(s)"))
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running fetch job {job.id}")
+            try:
+                run_fetch_job(job, workers=options["workers"], stdout=self.stdout)
+                self.stdout.write(self.style.SUCCESS(f"✓ Fetch job {job.id} finished"))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Fetch job {job.id} failed: {e}"))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from news.ranking import TRENDING
+from news.trending import rank_trending
+
+
+class Command(BaseCommand):
+    help = "Rewrites the trending slots from decayed visit velocity (run it from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-hours", type=int, default=48,
+                            help="Only visit buckets this recent are scored.")
+        parser.add_argument("--half-life", type=float, default=6,
+                            help="Hours after which a visit counts half as much.")
+        parser.add_argument("--max-age-days", type=int, default=3,
+                            help="Only posts published this recently can trend.")
+        parser.add_argument("--limit", type=int, default=TRENDING.capacity,
+                            help=f"Slots to fill (at most {TRENDING.capacity}).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Print the ranking without changing the slots.")
+
+    def handle(self, *args, **options):
+        ranked = rank_trending(
+            limit=options["limit"],
+            dry_run=options["dry_run"],
+            window_hours=options["window_hours"],
+            half_life_hours=options["half_life"],
+            max_age_days=options["max_age_days"],
+        )
+        if not ranked:
+            self.stdout.write(self.style.WARNING("⚠️ No recent visits, trending slots left unchanged"))
+            return
+
+        for priority, (post_id, score) in enumerate(ranked, start=1):
+            self.stdout.write(f"{priority:>3}. {post_id}  {score:.2f}")
+        verb = "Would set" if options["dry_run"] else "✓ Set"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(ranked)} trending posts"))
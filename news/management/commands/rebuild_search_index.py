@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from news.models import NewsPost
+from news.search import refresh_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Recomputes NewsPost.search_vector for every post (e.g. after the column is added)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Posts updated per statement.")
+
+    def handle(self, *args, **options):
+        pks = NewsPost.objects.order_by("pk").values_list("pk", flat=True)
+        batch, done = [], 0
+        for pk in pks.iterator(chunk_size=options["batch_size"]):
+            batch.append(pk)
+            if len(batch) >= options["batch_size"]:
+                refresh_search_vectors(NewsPost.objects.filter(pk__in=batch))
+                done += len(batch)
+                batch = []
+        if batch:
+            refresh_search_vectors(NewsPost.objects.filter(pk__in=batch))
+            done += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"✓ Search vectors rebuilt for {done} posts"))
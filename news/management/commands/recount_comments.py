@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from news.comments import recount
+from news.models import NewsPost
+
+
+class Command(BaseCommand):
+    help = "Recomputes NewsPost.comment_count from the comments relation (e.g. after the column is added)"
+
+    def handle(self, *args, **options):
+        updated = recount(NewsPost.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"✓ Comment counts recomputed for {updated} posts"))
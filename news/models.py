@@ -1,8 +1,11 @@
 from django.db import models
+from django.db.models.functions import Substr
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractUser
 from multiselectfield import MultiSelectField
 import uuid
-from .constants import MAIN_CATEGORIES
+from .constants import EXCERPT_LENGTH, MAIN_CATEGORIES, NEWS_CARD_FIELDS, normalize_category
+from .indexes import SearchVectorIndex
 from django.utils import timezone 
 from django.contrib.auth.models import BaseUserManager
 
@@ -55,6 +58,16 @@ class Comment(models.Model):
     date = models.DateField()
     time = models.TimeField()
 
+    class Meta:
+        indexes = [
+            # Newest-first comment pages (keyset on date, time, id). Posts are
+            # reached through the M2M table, so this cannot be a per-post
+            # ordered scan: Postgres either sorts the post's through rows
+            # (top-N) or walks this index filtering by post. See
+            # ``manage.py explain_queries``.
+            models.Index(fields=['-date', '-time', 'id'], name='comment_recent_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.comment[:30]}..."
 
@@ -91,6 +104,28 @@ class AdminAccount(models.Model):
         return f"{self.employee_id} - {self.first_name} {self.last_name} ({self.user_type})"
 
 
+class NewsPostQuerySet(models.QuerySet):
+    def for_listing(self, expand=()):
+        """Loads only the card columns; the excerpt is cut from content in SQL."""
+        queryset = self.only(*NEWS_CARD_FIELDS).annotate(
+            excerpt_source=Substr('content', 1, EXCERPT_LENGTH + 1)
+        )
+        if 'comments' in expand:
+            queryset = queryset.with_comments()
+        return queryset
+
+    def top_news(self):
+        return self.filter(is_top_news=True).order_by('top_news_priority')
+
+    def trending(self):
+        return self.filter(is_trending=True).order_by('trending_priority')
+
+    def with_comments(self):
+        # Serializers nest every comment; fetch them in one query for the
+        # whole page instead of one per post.
+        return self.prefetch_related('comments')
+
+
 class NewsPost(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     image = models.URLField()
@@ -100,11 +135,15 @@ class NewsPost(models.Model):
     time = models.TimeField()
     source = models.CharField(max_length=255)
     comments = models.ManyToManyField(Comment, blank=True, related_name='news_posts')
+    # Kept in step with ``comments`` by CommentCreateView and the Comment
+    # delete signal; `manage.py recount_comments` rebuilds it.
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
     views = models.PositiveIntegerField(default=0)
-    share_link = models.URLField()
+    share_link = models.URLField(unique=True)
     main_category = models.CharField(max_length=50, choices=MAIN_CATEGORIES)
     sub_category = models.CharField(max_length=100, blank=True)
    
+    # Written by the buffered flush in news/visits.py, never through save().
     daily_visitors = models.IntegerField(default=0)
     monthly_visitors = models.IntegerField(default=0)
     last_visited = models.DateField(null=True, blank=True)
@@ -145,24 +184,121 @@ class NewsPost(models.Model):
     # ✅ New Field
     
     is_posted = models.BooleanField(default=False, help_text="Mark as posted or unposted.")
-    def update_visit_counts(self):
-        today = timezone.now().date()
-        if self.last_visited != today:
-            self.daily_visitors = 1
-            if self.last_visited and self.last_visited.month != today.month:
-                self.monthly_visitors = 1
-            else:
-                self.monthly_visitors += 1
-            self.last_visited = today
-        else:
-            self.daily_visitors += 1
-            self.monthly_visitors += 1
-        self.save()
+
+    # Weighted header (A) + content (B) tsvector, kept current by news/signals.py.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = NewsPostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Matches KeysetPagination's ordering for the news feed, with and
+            # without a category filter (?date= is an equality prefix of the first).
+            models.Index(fields=['-date', '-time', 'id']),
+            models.Index(fields=['main_category', '-date', '-time', 'id']),
+            # Only 20/30 rows ever match; keep those indexes that small.
+            models.Index(
+                fields=['top_news_priority'],
+                condition=models.Q(is_top_news=True),
+                name='newspost_top_news_idx'
+            ),
+            models.Index(
+                fields=['trending_priority'],
+                condition=models.Q(is_trending=True),
+                name='newspost_trending_idx'
+            ),
+            SearchVectorIndex(fields=['search_vector'], name='newspost_search_vector_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.main_category = normalize_category(self.main_category) or self.main_category
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.header
     
 
 
+class PostVisitBucket(models.Model):
+    # Rows with post=None are the site-wide rollup for the hour, so window
+    # totals never have to aggregate across every post.
+    post = models.ForeignKey(
+        NewsPost,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='visit_buckets'
+    )
+    bucket = models.DateTimeField(help_text="Start of the hour these visits fall in.")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'bucket'], name='unique_post_visit_bucket'),
+            models.UniqueConstraint(
+                fields=['bucket'],
+                condition=models.Q(post__isnull=True),
+                name='unique_site_visit_bucket'
+            ),
+        ]
+        indexes = [
+            # Window scans (trending, visit stats) range over bucket first.
+            models.Index(fields=['bucket', 'post'], name='visit_bucket_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id or 'site'} @ {self.bucket:%Y-%m-%d %H:00}: {self.count}"
+
+
+class FeedState(models.Model):
+    rss_url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    seen_entry_ids = models.JSONField(default=list, blank=True)
+    last_polled = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.rss_url
+
+
+class FetchJob(models.Model):
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    requested_by = models.ForeignKey(
+        CustomUser,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='fetch_jobs'
+    )
+    feeds_total = models.PositiveIntegerField(default=0)
+    feeds_done = models.PositiveIntegerField(default=0)
+    feeds_not_modified = models.PositiveIntegerField(default=0)
+    articles_created = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ({self.status})"
+
+
 class Advertisement(models.Model):
     AD_TYPES = [
         ('image', 'Image'),
@@ -188,6 +324,10 @@ class Advertisement(models.Model):
     redirect_url = models.URLField(blank=True, null=True)
     category = models.CharField(max_length=100, choices=MAIN_CATEGORIES)
     is_active = models.BooleanField(default=True)
+    weight = models.PositiveIntegerField(
+        default=1,
+        help_text="Relative share of impressions among ads competing for the same slot; 0 never rotates in."
+    )
     start_date = models.DateField()
     end_date = models.DateField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -210,8 +350,33 @@ class Advertisement(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Cold path of the ad cache: live ads of one space.
+            models.Index(fields=['ad_space', 'is_active', 'start_date', 'end_date'], name='ad_serving_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class AdStatHour(models.Model):
+    ad = models.ForeignKey(Advertisement, on_delete=models.CASCADE, related_name='hourly_stats')
+    hour = models.DateTimeField(help_text="Start of the hour these events fall in.")
+    impressions = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ad', 'hour'], name='unique_ad_stat_hour'),
+        ]
+        indexes = [
+            # Reports across all ads range over hour first.
+            models.Index(fields=['hour'], name='ad_stat_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ad_id} @ {self.hour:%Y-%m-%d %H:00}: {self.impressions}/{self.clicks}"
+
+
 
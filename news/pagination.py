@@ -0,0 +1,134 @@
+import base64
+import json
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite ordering.
+
+    The cursor carries the ordering values of the last (or first) row served,
+    and the next page is fetched with a ``WHERE (a, b, c) < (...)``-style
+    filter, so deep pages cost the same as the first one as long as an index
+    matches ``ordering``. Views may override the ordering with a
+    ``keyset_ordering`` attribute.
+    """
+    ordering = ('-date', '-time', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset)
+
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, reverse))
+        ordering = [self.flip(field) for field in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        # Walking backwards means there is a page after this one (we came from it).
+        self.has_next = reverse or has_more
+        self.has_previous = has_more if reverse else values is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.link(self.page[0], reverse=True)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def seek(self, values, reverse):
+        """Rows strictly after ``values`` in the (possibly reversed) ordering."""
+        clauses = []
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            clause = Q(**{f'{name}__{"lt" if descending else "gt"}': values[i]})
+            for prior, value in zip(self.ordering[:i], values):
+                clause &= Q(**{prior.lstrip('-'): value})
+            clauses.append(clause)
+        # Redundant with the OR chain, but gives the planner an index range
+        # condition on the leading column.
+        first = self.ordering[0]
+        descending = first.startswith('-') != reverse
+        bound = Q(**{f'{first.lstrip("-")}__{"lte" if descending else "gte"}': values[0]})
+        return bound & reduce(or_, clauses)
+
+    def link(self, row, reverse):
+        values = [str(getattr(row, field.lstrip('-'))) for field in self.ordering]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursors are client input: convert them here so a tampered value is
+        # a 404 rather than a database error inside seek().
+        try:
+            values = [
+                self.ordering_field(queryset, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    @staticmethod
+    def ordering_field(queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.dispatch import Signal
+
+from .models import NewsPost
+
+# Priorities are parked above this while a range is being shifted, so the
+# unique priority columns never see two rows on the same value mid-UPDATE.
+SHIFT_OFFSET = 1000
+
+# Sent (after commit) with ``slots`` whenever a slot set's membership or
+# order changes; cached top/trending responses listen to this.
+slots_changed = Signal()
+
+
+class SlotSet:
+    """A fixed number of ranked slots backed by a flag and a unique priority column."""
+
+    def __init__(self, name, flag, priority, capacity):
+        self.name = name
+        self.slug = name.replace(' ', '-')
+        self.flag = flag
+        self.priority = priority
+        self.capacity = capacity
+
+    def members(self):
+        return NewsPost.objects.filter(**{self.flag: True})
+
+
+TOP_NEWS = SlotSet('top news', 'is_top_news', 'top_news_priority', 20)
+TRENDING = SlotSet('trending', 'is_trending', 'trending_priority', 30)
+
+
+def notify(slots):
+    transaction.on_commit(lambda: slots_changed.send(sender=SlotSet, slots=slots))
+
+
+def shift(slots, queryset, delta):
+    """Moves every priority in ``queryset`` by ``delta`` in two collision-free UPDATEs."""
+    field = slots.priority
+    if queryset.update(**{field: F(field) + SHIFT_OFFSET + delta}):
+        slots.members().filter(**{f'{field}__gt': SHIFT_OFFSET}).update(**{field: F(field) - SHIFT_OFFSET})
+
+
+@transaction.atomic
+def assign(slots, news_post, priority):
+    """
+    Puts ``news_post`` at ``priority``, moving the other members out of the way.
+
+    A post already in the set moves within it; a new post pushes everything
+    at or below ``priority`` down one slot and drops whatever falls off the end.
+    Runs a constant number of statements regardless of how many posts move.
+    """
+    if not (1 <= priority <= slots.capacity):
+        raise ValueError(f"Priority must be between 1 and {slots.capacity}.")
+
+    field = slots.priority
+    others = slots.members().exclude(pk=news_post.pk)
+    current = slots.members().filter(pk=news_post.pk).values_list(field, flat=True).first()
+
+    if current is not None:
+        # Vacate the post's own slot first so the shift can move into it.
+        NewsPost.objects.filter(pk=news_post.pk).update(**{field: None})
+
+    if current is None:
+        # Whoever holds the last slot would be pushed past capacity.
+        others.filter(**{f'{field}__gte': slots.capacity}).update(**{slots.flag: False, field: None})
+        shift(slots, others.filter(**{f'{field}__gte': priority}), +1)
+    elif current > priority:
+        shift(slots, others.filter(**{f'{field}__gte': priority, f'{field}__lt': current}), +1)
+    elif current < priority:
+        shift(slots, others.filter(**{f'{field}__gt': current, f'{field}__lte': priority}), -1)
+
+    NewsPost.objects.filter(pk=news_post.pk).update(**{slots.flag: True, field: priority})
+    setattr(news_post, slots.flag, True)
+    setattr(news_post, field, priority)
+    notify(slots)
+
+
+@transaction.atomic
+def reorder(slots, ordered_ids):
+    """
+    Replaces the whole slot set with ``ordered_ids`` (first id = priority 1).
+
+    Posts not in the list leave the set. One validating SELECT plus three
+    UPDATEs, however many posts are listed.
+    """
+    if len(ordered_ids) > slots.capacity:
+        raise ValueError(f"At most {slots.capacity} posts fit in {slots.name}.")
+    if len(set(ordered_ids)) != len(ordered_ids):
+        raise ValueError("Each post may appear only once.")
+
+    found = set(NewsPost.objects.filter(pk__in=ordered_ids).values_list('pk', flat=True))
+    missing = [str(pk) for pk in ordered_ids if pk not in found]
+    if missing:
+        raise NewsPost.DoesNotExist(f"News Post Not Found: {', '.join(missing)}")
+
+    field = slots.priority
+    slots.members().exclude(pk__in=ordered_ids).update(**{slots.flag: False, field: None})
+    if ordered_ids:
+        # Same two-phase trick as shift(): park the new priorities above the
+        # offset so swapping two posts never collides on the unique column.
+        NewsPost.objects.filter(pk__in=ordered_ids).update(**{
+            slots.flag: True,
+            field: Case(
+                *[When(pk=pk, then=Value(SHIFT_OFFSET + i)) for i, pk in enumerate(ordered_ids, start=1)],
+                output_field=IntegerField(),
+            ),
+        })
+        slots.members().filter(**{f'{field}__gt': SHIFT_OFFSET}).update(**{field: F(field) - SHIFT_OFFSET})
+    notify(slots)
+
+
+def auto_assign(slots, news_post):
+    """Puts ``news_post`` in the best free slot, or the last one when the set is full."""
+    taken = set(slots.members().values_list(slots.priority, flat=True))
+    free = [i for i in range(1, slots.capacity + 1) if i not in taken]
+    assign(slots, news_post, free[0] if free else slots.capacity)
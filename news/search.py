@@ -0,0 +1,115 @@
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+
+from .models import NewsPost
+
+SEARCH_CONFIG = 'english'
+FALLBACK_RESULT_LIMIT = 500
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_vector():
+    return (
+        SearchVector('header', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def uses_postgres():
+    return connection.vendor == 'postgresql'
+
+
+def refresh_search_vectors(queryset):
+    """Recomputes ``search_vector`` for ``queryset`` (one UPDATE on Postgres)."""
+    if uses_postgres():
+        queryset.update(search_vector=search_vector())
+    else:
+        fallback_index.invalidate()
+
+
+def search_posts(queryset, term):
+    """Filters ``queryset`` to posts matching ``term``, annotated with ``rank``."""
+    if uses_postgres():
+        query = SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+        # ts_rank returns real; cast so the rank survives a round trip
+        # through a pagination cursor exactly.
+        return queryset.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), query), FloatField())
+        )
+
+    scores = fallback_index.search(term, limit=FALLBACK_RESULT_LIMIT)
+    if not scores:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    return queryset.filter(pk__in=scores).annotate(rank=Case(
+        *[When(pk=pk, then=Value(score)) for pk, score in scores.items()],
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Pure-Python stand-in for the Postgres GIN index, used on SQLite (tests and
+    local development). Built lazily from the table and dropped whenever a
+    post changes; header terms count double, like weight A over B.
+    """
+
+    HEADER_WEIGHT = 2.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = None
+        self._documents = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._postings = None
+
+    def build(self):
+        postings = defaultdict(dict)
+        documents = 0
+        rows = NewsPost.objects.values_list('pk', 'header', 'content')
+        for pk, header, content in rows.iterator(chunk_size=2000):
+            documents += 1
+            weights = defaultdict(float)
+            for token in tokenize(header):
+                weights[token] += self.HEADER_WEIGHT
+            for token in tokenize(content):
+                weights[token] += 1.0
+            for token, weight in weights.items():
+                postings[token][pk] = weight
+        return postings, documents
+
+    def search(self, term, limit):
+        tokens = set(tokenize(term))
+        if not tokens:
+            return {}
+        with self._lock:
+            if self._postings is None:
+                self._postings, self._documents = self.build()
+            postings, documents = self._postings, self._documents
+
+        matches = [postings.get(token, {}) for token in tokens]
+        candidates = set.intersection(*(set(match) for match in matches))
+        scores = {}
+        for pk in candidates:
+            scores[pk] = sum(
+                (1 + math.log(match[pk])) * math.log(1 + documents / len(match))
+                for match in matches
+            )
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return dict(best)
+
+
+fallback_index = InvertedIndex()
@@ -1,11 +1,12 @@
 from rest_framework import serializers
-from .models import Advertisement, NewsPost, Comment, CustomUser, AdminAccount
+from .models import Advertisement, NewsPost, Comment, CustomUser, AdminAccount, FetchJob
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as BaseUserSerializer
-from .constants import MAIN_CATEGORIES
+from .constants import EXCERPT_LENGTH, MAIN_CATEGORIES, NEWS_CARD_FIELDS
 from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.utils.text import Truncator
 
 
 class CustomUserCreateSerializer(BaseUserCreateSerializer):
@@ -45,24 +46,69 @@ class CommentSerializer(serializers.ModelSerializer):
 
 
 class NewsPostSerializer(serializers.ModelSerializer):
+    """Full post; comments are embedded only with ``expand=['comments']``."""
     comments = CommentSerializer(many=True, read_only=True)
     share_Link = serializers.SerializerMethodField(read_only=True)
 
+    def __init__(self, *args, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'comments' not in expand:
+            self.fields.pop('comments')
+
     def get_share_Link(self, obj):
         return obj.share_link
 
     class Meta:
         model = NewsPost
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['share_Link']
 
 
+class NewsPostListSerializer(serializers.ModelSerializer):
+    """
+    Card-sized representation for list endpoints.
+
+    ``fields`` limits the output to a subset of the card fields and
+    ``expand=['comments']`` embeds the comments; full bodies are only served
+    by NewsPostDetailView.
+    """
+    excerpt = serializers.SerializerMethodField()
+    comments = CommentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = NewsPost
+        fields = NEWS_CARD_FIELDS + ['excerpt', 'comments']
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'comments' not in expand:
+            self.fields.pop('comments')
+        if fields:
+            for name in set(self.fields) - set(fields) - {'comments'}:
+                self.fields.pop(name)
+
+    def get_excerpt(self, obj):
+        content = getattr(obj, 'excerpt_source', None)
+        if content is None:
+            content = obj.content
+        return Truncator(content.strip()).chars(EXCERPT_LENGTH)
+
+
 class AdvertisementSerializer(serializers.ModelSerializer):
     class Meta:
         model = Advertisement
         fields = '__all__'
 
 
+class FetchJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FetchJob
+        fields = [
+            'id', 'status', 'feeds_total', 'feeds_done', 'feeds_not_modified',
+            'articles_created', 'errors', 'message', 'created_at', 'started_at', 'heartbeat_at', 'finished_at'
+        ]
+
+
 class AdminAccountSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(write_only=True)
     date_of_birth = serializers.DateField(write_only=True)
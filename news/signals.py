@@ -0,0 +1,107 @@
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import ads, listings, ranking
+from .comments import recount
+from .http_cache import invalidate_tags
+from .models import Advertisement, Comment, NewsPost
+from .search import fallback_index, refresh_search_vectors
+from .stats import invalidate_counters
+
+
+@receiver([post_save, post_delete], sender=NewsPost)
+@receiver([post_save, post_delete], sender=Advertisement)
+def invalidate_stats(sender, **kwargs):
+    invalidate_counters()
+
+
+@receiver([post_save, post_delete], sender=Advertisement)
+def invalidate_ads(sender, **kwargs):
+    ads.invalidate()
+
+
+@receiver(post_save, sender=NewsPost)
+def update_search_vector(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'header', 'content'} & set(update_fields):
+        return
+    refresh_search_vectors(NewsPost.objects.filter(pk=instance.pk))
+
+
+@receiver([post_save, post_delete], sender=NewsPost)
+def invalidate_listings(sender, instance, **kwargs):
+    listings.invalidate_post(instance)
+
+
+@receiver(ranking.slots_changed)
+def rebuild_listing(sender, slots, **kwargs):
+    listings.invalidate(slots)
+    invalidate_tags(f"slots:{slots.slug}")
+
+
+# --- HTTP response cache tags (news/http_cache.py) ---------------------------
+
+@receiver([post_save, post_delete], sender=NewsPost)
+def invalidate_post_responses(sender, instance, **kwargs):
+    # Pages that held the post before an edit carry its post tag; the list and
+    # category tags cover pages it now appears on.
+    invalidate_tags(f'post:{instance.pk}', 'news:list', f'category:{instance.main_category}')
+
+
+def posts_bulk_created(categories):
+    """
+    The cache side of the post_save receivers, for posts added with
+    bulk_create (which sends no signals). Search vectors are refreshed by
+    bulk_import.insert_new_posts, possibly in another process.
+    """
+    fallback_index.invalidate()
+    invalidate_counters()
+    invalidate_tags('news:list', *[f'category:{category}' for category in categories])
+
+
+@receiver(m2m_changed, sender=NewsPost.comments.through)
+def invalidate_commented_post(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # comment.news_posts.clear() names no posts afterwards; note them now.
+        instance._cleared_post_ids = set(instance.news_posts.values_list('pk', flat=True))
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        post_ids = {instance.pk}
+    elif action == 'post_clear':
+        post_ids = getattr(instance, '_cleared_post_ids', set())
+    else:
+        post_ids = pk_set or set()
+
+    # add/remove/clear through the relation (e.g. the admin form) bypass
+    # add_comment, so keep comment_count in step here. Recounted rather than
+    # adjusted by len(pk_set): remove() reports the IDs it was given, not
+    # the rows it actually deleted.
+    if post_ids:
+        recount(NewsPost.objects.filter(pk__in=post_ids))
+    invalidate_tags(*[f'post:{pk}' for pk in post_ids])
+
+
+@receiver(pre_delete, sender=Comment)
+def drop_comment_count(sender, instance, **kwargs):
+    # The through rows go with the comment, without an m2m_changed signal.
+    NewsPost.objects.filter(comments=instance, comment_count__gt=0).update(comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(pre_delete, sender=Comment)
+def invalidate_comment_posts(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return  # not attached to any post yet
+    invalidate_tags(*[f'post:{pk}' for pk in instance.news_posts.values_list('pk', flat=True)])
+
+
+@receiver([post_save, post_delete], sender=Advertisement)
+def invalidate_ad_responses(sender, **kwargs):
+    invalidate_tags('ads')
+
+
+@receiver(post_delete, sender=NewsPost)
+def drop_from_search_index(sender, **kwargs):
+    # On Postgres the vector goes away with the row; only the fallback needs a rebuild.
+    fallback_index.invalidate()
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Advertisement, NewsPost
+from .visits import visits_between
+
+COUNTERS_CACHE_KEY = 'news:stats:counters'
+STATS_CACHE_TTL = getattr(settings, 'STATS_CACHE_TTL', 10)
+
+
+def get_counters():
+    """Post and ad totals: one conditional-aggregation query per table, cached."""
+    counters = cache.get(COUNTERS_CACHE_KEY)
+    if counters is None:
+        counters = {
+            **NewsPost.objects.aggregate(
+                totalPosts=Count('pk'),
+                editedPosts=Count('pk', filter=Q(updated_by_employee__isnull=False)),
+            ),
+            **Advertisement.objects.aggregate(
+                totalAds=Count('pk'),
+                activeAds=Count('pk', filter=Q(is_active=True)),
+            ),
+        }
+        cache.set(COUNTERS_CACHE_KEY, counters, STATS_CACHE_TTL)
+    return counters
+
+
+def invalidate_counters():
+    cache.delete(COUNTERS_CACHE_KEY)
+
+
+def get_site_visitors():
+    """Today's and the trailing 30 days' site-wide visits, cached for the TTL."""
+    now = timezone.now()
+    today_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    key = f'news:stats:visitors:{today_start:%Y-%m-%d}'
+    visitors = cache.get(key)
+    if visitors is None:
+        visitors = {
+            "dailyVisitors": visits_between(today_start, now),
+            "monthlyVisitors": visits_between(today_start - timedelta(days=29), now),
+        }
+        cache.set(key, visitors, STATS_CACHE_TTL)
+    return visitors
@@ -1,3 +1,518 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import threading
+import uuid
+from concurrent.futures import Future
+from datetime import date, datetime, time, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DataError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from feedparser import FeedParserDict
+from rest_framework.test import APIClient
+
+from .bulk_import import import_batch
+from .comments import add_comment
+from . import ranking
+from .constants import DEFAULT_IMAGE
+from .ingest import FeedIngestor, SeenLinkCache
+from .jobs import STALE_JOB_AFTER, claim_next_job, fail_stale_jobs
+from .models import Advertisement, Comment, CustomUser, FeedState, FetchJob, NewsPost
+
+LIST_ENDPOINTS = [
+    "/api/news/",
+    "/api/news/?expand=comments",
+    "/api/top-news/",
+    "/api/top-news/?expand=comments",
+    "/api/trending-news/",
+    "/api/trending-news/?expand=comments",
+]
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ListQueryCountTests(TestCase):
+    """N+1 guard: list endpoints must cost the same number of queries for 5 posts as for 50."""
+
+    def seed(self, count, comments_per_post=3):
+        for i in range(NewsPost.objects.count(), count):
+            post = NewsPost.objects.create(
+                image="https://example.com/image.jpg",
+                header=f"Query budget post {i}",
+                content="Body",
+                date=date.today(),
+                time=time(12, 0),
+                source="tests",
+                share_link=f"https://example.com/{uuid.uuid4()}",
+                main_category="World-News",
+                is_top_news=i < 20,
+                top_news_priority=i + 1 if i < 20 else None,
+                is_trending=i < 30,
+                trending_priority=i + 1 if i < 30 else None,
+            )
+            post.comments.add(*Comment.objects.bulk_create(
+                Comment(name="Reader", profile_pic="https://example.com/p.jpg",
+                        comment="Nice", date=date.today(), time=time(12, 0))
+                for _ in range(comments_per_post)
+            ))
+
+    def get(self, path):
+        # Measure the build, not a cached response or materialized body.
+        cache.clear()
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        self.seed(5)
+        budget = {}
+        for path in LIST_ENDPOINTS:
+            with CaptureQueriesContext(connection) as queries:
+                self.get(path)
+            budget[path] = len(queries)
+
+        self.seed(50)
+        for path in LIST_ENDPOINTS:
+            with self.subTest(path=path), self.assertNumQueries(budget[path]):
+                self.get(path)
+
+
+FEED_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel>
+  <title>Stand-in World Desk</title>
+  <link>{base}/</link>
+  <description>Fixture feed</description>
+  {items}
+</channel></rss>
+"""
+
+ITEM_TEMPLATE = """<item>
+    <title>{title}</title>
+    <link>{base}/articles/{slug}</link>
+    <guid>{base}/articles/{slug}</guid>
+    <pubDate>{published}</pubDate>
+    <description>&lt;p&gt;{title} summary&lt;/p&gt;</description>
+  </item>"""
+
+ARTICLE_TEMPLATE = """<html><head><title>{slug}</title></head>
+<body><article><h1>{slug}</h1><p>Full text of {slug}.</p></article></body></html>
+"""
+
+
+class FeedServer(ThreadingHTTPServer):
+    """Local stand-in for a publisher: one RSS feed with an ETag, plus article pages."""
+
+    daemon_threads = True
+    etag = '"feed-v1"'
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FeedRequestHandler)
+        self.base = f"http://127.0.0.1:{self.server_port}"
+        self.feed_requests = []
+        published = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+        self.feed = FEED_TEMPLATE.format(base=self.base, items="\n  ".join(
+            ITEM_TEMPLATE.format(base=self.base, slug=slug, title=title, published=published)
+            for slug, title in [
+                ("world-summit", "World leaders meet at summit"),
+                ("border-talks", "Border talks resume in world capital"),
+                ("cooking", "Ten recipes for the weekend"),
+                ("world-" + "x" * 200, "World record for the longest link"),
+            ]
+        )).encode()
+
+
+class FeedRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/feed.xml":
+            self.server.feed_requests.append(dict(self.headers))
+            if self.headers.get("If-None-Match") == self.server.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.reply(self.server.feed, "application/rss+xml", ETag=self.server.etag)
+        elif self.path.startswith("/articles/"):
+            self.reply(ARTICLE_TEMPLATE.format(slug=self.path.rsplit("/", 1)[1]).encode(), "text/html")
+        else:
+            self.send_error(404)
+
+    def reply(self, body, content_type, **headers):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class FeedIngestTests(TestCase):
+    """Runs FeedIngestor end to end against a local HTTP stand-in."""
+
+    def setUp(self):
+        self.server = FeedServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.source = {
+            "name": "Stand-in World Desk",
+            "website": self.server.base,
+            "rss": f"{self.server.base}/feed.xml",
+            "main_category": "World-News",
+        }
+        # Keep the process-wide LRU from leaking links between tests.
+        patcher = mock.patch("news.ingest.seen_links", SeenLinkCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def ingest(self, conditional=True):
+        return FeedIngestor(
+            [self.source], {"World-News": ["world"]},
+            workers=2, timeout=5, deadline=30, conditional=conditional,
+        ).run()
+
+    def test_poll_stores_then_not_modified_then_dedupes_full_reread(self):
+        stats = self.ingest()
+        self.assertEqual((stats.feeds_done, stats.articles_created, stats.errors), (1, 2, 0))
+        self.assertEqual(
+            set(NewsPost.objects.values_list("share_link", flat=True)),
+            {f"{self.server.base}/articles/world-summit", f"{self.server.base}/articles/border-talks"},
+        )
+        self.assertEqual(FeedState.objects.get(rss_url=self.source["rss"]).etag, FeedServer.etag)
+
+        stats = self.ingest()
+        self.assertEqual((stats.feeds_not_modified, stats.articles_created), (1, 0))
+        self.assertEqual(self.server.feed_requests[-1].get("If-None-Match"), FeedServer.etag)
+
+        stats = self.ingest(conditional=False)
+        self.assertEqual((stats.feeds_not_modified, stats.articles_created, stats.errors), (0, 0, 0))
+        self.assertNotIn("If-None-Match", self.server.feed_requests[-1])
+        self.assertEqual(NewsPost.objects.count(), 2)
+
+    def unsaved_post(self, header, slug):
+        return self.source["rss"], NewsPost(
+            id=uuid.uuid4(), header=header, content="Body", date=date.today(), time=time(12, 0),
+            source="tests", image="https://example.com/image.jpg",
+            share_link=f"{self.server.base}/articles/{slug}", main_category="World-News",
+        )
+
+    def test_flush_counts_only_rows_it_inserted(self):
+        ingestor = FeedIngestor([self.source], {"World-News": ["world"]})
+        # Two rows racing for one share_link: ignore_conflicts keeps one.
+        ingestor._unsaved = [self.unsaved_post(f"Copy {i}", "race") for i in range(2)]
+        ingestor.flush()
+        self.assertEqual(ingestor.stats.articles_created, 1)
+        self.assertEqual(NewsPost.objects.count(), 1)
+
+    def test_overlong_image_falls_back_to_default(self):
+        ingestor = FeedIngestor([self.source], {"World-News": ["world"]})
+        article = Future()
+        article.set_result(("Body", "https://cdn.example.com/image.jpg?" + "q" * 300))
+        entry = FeedParserDict(title="World news", link=f"{self.server.base}/articles/cdn")
+        ingestor.handle_article(self.source, entry, datetime.now(), article)
+        self.assertEqual(ingestor._unsaved[0][1].image, DEFAULT_IMAGE)
+
+    def test_failed_flush_expires_feed_state(self):
+        FeedState.objects.create(rss_url=self.source["rss"], etag=FeedServer.etag, last_modified="Mon")
+        ingestor = FeedIngestor([self.source], {"World-News": ["world"]})
+        ingestor._unsaved = [self.unsaved_post("World news", "too-long")]
+        with mock.patch.object(NewsPost.objects, "bulk_create", side_effect=DataError("value too long")):
+            ingestor.flush()
+        self.assertEqual((ingestor.stats.errors, ingestor.stats.articles_created), (1, 0))
+        state = FeedState.objects.get(rss_url=self.source["rss"])
+        self.assertEqual((state.etag, state.last_modified), ("", ""))
+
+
+class StaleFetchJobTests(TestCase):
+    def test_running_jobs_without_a_recent_heartbeat_are_failed(self):
+        FetchJob.objects.create()
+        live = claim_next_job()
+        dead = FetchJob.objects.create(status="running", heartbeat_at=django_timezone.now() - STALE_JOB_AFTER * 2)
+        legacy = FetchJob.objects.create(status="running", started_at=django_timezone.now() - STALE_JOB_AFTER * 2)
+        queued = FetchJob.objects.create()
+
+        self.assertEqual(fail_stale_jobs(), 2)
+        statuses = dict(FetchJob.objects.values_list("pk", "status"))
+        self.assertEqual(
+            [statuses[job.pk] for job in (live, dead, legacy, queued)],
+            ["running", "failed", "failed", "queued"],
+        )
+        self.assertIsNotNone(FetchJob.objects.get(pk=dead.pk).finished_at)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class VisitWindowTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user("admin@example.com", "admin"))
+
+    def test_days_must_be_at_least_one(self):
+        for days in ("0", "-3", "abc"):
+            with self.subTest(days=days):
+                response = self.client.get("/api/admin/stats/", {"days": days})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("days", response.json())
+
+    def test_start_and_end_must_be_real_dates(self):
+        for path in ("/api/admin/stats/", "/api/ads/stats/"):
+            for params in ({"start": "2024-02-30"}, {"end": "2024-13-01"}, {"start": "abc"}):
+                with self.subTest(path=path, params=params):
+                    response = self.client.get(path, params)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(next(iter(params)), response.json())
+
+        response = self.client.get("/api/admin/stats/", {"start": "2024-02-01", "end": "2024-02-29"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["windowStart"], response.json()["windowEnd"]), ("2024-02-01", "2024-02-29"))
+
+    def test_one_day_window(self):
+        response = self.client.get("/api/admin/stats/", {"days": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["windowStart"], response.json()["windowEnd"])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # Few distinct (date, time) pairs, so ties fall through to id.
+        for i in range(25):
+            NewsPost.objects.create(
+                image="https://example.com/image.jpg",
+                header=f"Election update {i}" if i % 5 else f"Weather report {i}",
+                content="Polling stations opened early" if i % 5 else "Sunny",
+                date=date.today() - timedelta(days=i % 2),
+                time=time(i % 3, 0),
+                source="tests",
+                share_link=f"https://example.com/paging/{i}",
+                main_category="Politics",
+            )
+
+    def walk(self, path):
+        pages, url = [], path
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url = pages[-1]["next"]
+        return pages
+
+    def test_pages_cover_every_post_once(self):
+        for path, expected in (("/api/news/?page_size=7", 25), ("/api/news/?page_size=7&search=election", 20)):
+            with self.subTest(path=path):
+                pages = self.walk(path)
+                ids = [post["id"] for page in pages for post in page["results"]]
+                self.assertEqual(len(ids), expected)
+                self.assertEqual(len(set(ids)), expected)
+                self.assertIsNone(pages[0]["previous"])
+
+                back = self.client.get(pages[1]["previous"]).json()
+                self.assertEqual([post["id"] for post in back["results"]],
+                                 [post["id"] for post in pages[0]["results"]])
+
+    def test_tampered_cursor_is_not_found(self):
+        def cursor(values):
+            payload = json.dumps({"v": values, "r": 0}).encode()
+            return base64.urlsafe_b64encode(payload).decode()
+
+        for path, values in (
+            ("/api/news/", ["x", "y", "z"]),
+            ("/api/news/", [str(date.today()), "25:00", str(uuid.uuid4())]),
+            ("/api/news/", [None, None, None]),
+            ("/api/news/?search=election", ["high", str(uuid.uuid4())]),
+        ):
+            with self.subTest(values=values):
+                response = self.client.get(path, {"cursor": cursor(values)})
+                self.assertEqual(response.status_code, 404)
+
+
+class ExportDateTests(TestCase):
+    def test_view_rejects_malformed_and_impossible_dates(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user("admin@example.com", "admin"))
+        for params in ({"start": "2024-02-30"}, {"end": "abc"}):
+            with self.subTest(params=params):
+                response = client.get("/api/news/export/", params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("error", response.json())
+
+    def test_command_rejects_malformed_and_impossible_dates(self):
+        for option in ("--start=2024-02-30", "--end=abc"):
+            with self.subTest(option=option), self.assertRaisesMessage(CommandError, "must be YYYY-MM-DD"):
+                call_command("export_news", option, stdout=io.StringIO())
+
+
+class ImportBatchTests(TestCase):
+    def row(self, slug, **overrides):
+        return {
+            "header": f"Imported {slug}", "content": "Body", "date": str(date.today()), "time": "12:00",
+            "source": "archive", "share_link": f"https://example.com/import/{slug}",
+            "main_category": "sport", **overrides,
+        }
+
+    def test_counts_created_duplicate_and_invalid_rows(self):
+        self.assertEqual(import_batch([(1, self.row("a"))]).created, 1)
+
+        result = import_batch([
+            (1, self.row("a")),  # already stored
+            (2, self.row("b")),
+            (3, self.row("b")),  # repeated within the batch
+            (4, self.row("c", image="https://cdn.example.com/" + "x" * 200)),
+        ])
+        self.assertEqual((result.created, result.duplicates, result.invalid), (1, 2, 1))
+        self.assertEqual(result.categories, {"Sport"})
+        self.assertIn("image is longer than 200 characters", result.errors[0])
+        self.assertEqual(NewsPost.objects.get(share_link__endswith="/b").image, DEFAULT_IMAGE)
+
+
+class RankingTests(TestCase):
+    """Slot moves run as set-based UPDATEs on unique priority columns; check the resulting order."""
+
+    def setUp(self):
+        self.posts = [
+            NewsPost.objects.create(
+                image="https://example.com/image.jpg", header=f"Ranked {i}", content="Body",
+                date=date.today(), time=time(12, 0), source="tests",
+                share_link=f"https://example.com/ranked/{i}", main_category="World-News",
+            )
+            for i in range(22)
+        ]
+        for priority, post in enumerate(self.posts[:20], start=1):
+            ranking.assign(ranking.TOP_NEWS, post, priority)
+
+    def top(self):
+        rows = ranking.TOP_NEWS.members().order_by("top_news_priority").values_list("pk", "top_news_priority")
+        pks, priorities = zip(*rows) if rows else ((), ())
+        self.assertEqual(list(priorities), list(range(1, len(pks) + 1)))
+        return list(pks)
+
+    def pks(self, posts):
+        return [post.pk for post in posts]
+
+    def test_insert_into_full_set_evicts_last_slot(self):
+        newcomer = self.posts[20]
+        ranking.assign(ranking.TOP_NEWS, newcomer, 5)
+        self.assertEqual(self.top(), self.pks(self.posts[:4] + [newcomer] + self.posts[4:19]))
+        evicted = NewsPost.objects.get(pk=self.posts[19].pk)
+        self.assertEqual((evicted.is_top_news, evicted.top_news_priority), (False, None))
+
+    def test_move_up_and_down_within_set(self):
+        post = self.posts[14]
+        ranking.assign(ranking.TOP_NEWS, post, 3)
+        expected = self.posts[:2] + [post] + self.posts[2:14] + self.posts[15:20]
+        self.assertEqual(self.top(), self.pks(expected))
+
+        ranking.assign(ranking.TOP_NEWS, post, 18)
+        expected = self.posts[:14] + self.posts[15:18] + [post] + self.posts[18:20]
+        self.assertEqual(self.top(), self.pks(expected))
+
+    def test_reorder_swaps_and_drops_unlisted(self):
+        first, second = self.posts[:2]
+        ranking.reorder(ranking.TOP_NEWS, [second.pk, first.pk])
+        self.assertEqual(self.top(), [second.pk, first.pk])
+
+    def test_reorder_endpoint_errors(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user("admin@example.com", "admin"))
+        url = "/api/top-news/reorder/"
+        too_many = [str(post.pk) for post in self.posts[:21]]
+        for ids, status_code in (
+            ("not a list", 400),
+            (too_many, 400),
+            ([str(self.posts[0].pk)] * 2, 400),
+            (["not-a-uuid"], 400),
+            ([str(uuid.uuid4())], 404),
+        ):
+            with self.subTest(ids=ids):
+                response = client.post(url, {"ids": ids}, format="json")
+                self.assertEqual(response.status_code, status_code)
+                self.assertIn("error", response.json())
+        self.assertEqual(self.top(), self.pks(self.posts[:20]))
+
+        response = client.post(url, {"ids": [str(self.posts[1].pk), str(self.posts[0].pk)]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["priority"] for row in response.json()], [1, 2])
+        self.assertEqual(self.top(), [self.posts[1].pk, self.posts[0].pk])
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class ResponseCacheTests(TestCase):
+    """
+    Cached responses must drop once a change they depend on commits. Version
+    bumps run on commit, so writes go through captureOnCommitCallbacks; a
+    queryset.update() (no signals) shows when a response came from cache.
+    """
+
+    def setUp(self):
+        self.post = NewsPost.objects.create(
+            image="https://example.com/image.jpg", header="Original", content="Body",
+            date=date.today(), time=time(12, 0), source="tests",
+            share_link="https://example.com/cached", main_category="World-News",
+        )
+        self.detail = f"/api/news/{self.post.pk}/"
+
+    def header_of(self, path):
+        data = self.client.get(path).json()
+        return data["header"] if "header" in data else [post["header"] for post in data["results"]]
+
+    def test_post_save_drops_detail_and_list(self):
+        self.assertEqual(self.header_of(self.detail), "Original")
+        self.assertEqual(self.header_of("/api/news/"), ["Original"])
+        NewsPost.objects.filter(pk=self.post.pk).update(header="Unsignalled")
+        self.assertEqual(self.header_of(self.detail), "Original")
+        self.assertEqual(self.header_of("/api/news/"), ["Original"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.header = "Edited"
+            self.post.save()
+        self.assertEqual(self.header_of(self.detail), "Edited")
+        self.assertEqual(self.header_of("/api/news/"), ["Edited"])
+
+    def test_add_comment_drops_comment_page_and_detail(self):
+        comments = f"/api/news/{self.post.pk}/comments/"
+        self.assertEqual(self.client.get(comments).json()["results"], [])
+        self.assertEqual(self.client.get(self.detail).json()["comment_count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_comment(self.post.pk, {"name": "Reader", "profile_pic": "https://example.com/p.jpg",
+                                       "comment": "First", "date": date.today(), "time": time(13, 0)})
+        self.assertEqual([c["comment"] for c in self.client.get(comments).json()["results"]], ["First"])
+        self.assertEqual(self.client.get(self.detail).json()["comment_count"], 1)
+
+    def test_ad_save_drops_ad_list(self):
+        def ad(title):
+            return Advertisement(title=title, ad_type="text", ad_space="home-top", ad_text=title,
+                                 category="World-News", start_date=date.today(), end_date=date.today())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad("First").save()
+        self.assertEqual([row["title"] for row in self.client.get("/api/ads/").json()], ["First"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ad("Second").save()
+        self.assertEqual([row["title"] for row in self.client.get("/api/ads/").json()], ["First", "Second"])
+
+    def test_if_none_match_gets_304_until_the_post_changes(self):
+        etag = self.client.get(self.detail)["ETag"]
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.header = "Edited"
+            self.post.save()
+        response = self.client.get(self.detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["header"], "Edited")
@@ -0,0 +1,66 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from . import ranking
+from .models import PostVisitBucket
+
+
+def velocity_scores(now=None, window_hours=48, half_life_hours=6, max_age_days=3):
+    """
+    Returns ``(post_ids, scores)`` for posts with visits in the window.
+
+    A post's score is its hourly visit counts weighted by
+    ``0.5 ** (age / half_life)``, so a burst of visits this hour outranks a
+    larger total spread over yesterday. Only buckets inside the window for
+    posts published in the last ``max_age_days`` are read, which keeps the
+    work proportional to recent traffic rather than to the table size.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(hours=window_hours)
+    rows = PostVisitBucket.objects.filter(
+        bucket__gte=since,
+        bucket__lte=now,
+        post__isnull=False,
+        post__date__gte=(now - timedelta(days=max_age_days)).date(),
+    ).values_list('post_id', 'bucket', 'count')
+
+    codes = {}
+    post_index, ages, counts = [], [], []
+    for post_id, bucket, count in rows.iterator(chunk_size=5000):
+        post_index.append(codes.setdefault(post_id, len(codes)))
+        ages.append((now - bucket).total_seconds() / 3600)
+        counts.append(count)
+
+    if not codes:
+        return [], np.empty(0)
+
+    decay = np.exp(-math.log(2) / half_life_hours * np.asarray(ages, dtype=np.float64))
+    scores = np.bincount(
+        np.asarray(post_index, dtype=np.intp),
+        weights=np.asarray(counts, dtype=np.float64) * decay,
+        minlength=len(codes),
+    )
+    return list(codes), scores
+
+
+def top_posts(post_ids, scores, limit):
+    """The ``limit`` highest-scoring ids, best first, without sorting every score."""
+    if len(post_ids) > limit:
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        candidates = np.arange(len(post_ids))
+    best = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return [post_ids[i] for i in best]
+
+
+def rank_trending(limit=ranking.TRENDING.capacity, dry_run=False, **options):
+    """Recomputes the trending slots; returns the ``(post_id, score)`` pairs applied."""
+    post_ids, scores = velocity_scores(**options)
+    ranked = top_posts(post_ids, scores, min(limit, ranking.TRENDING.capacity))
+    if ranked and not dry_run:
+        ranking.reorder(ranking.TRENDING, ranked)
+    lookup = dict(zip(post_ids, scores.tolist()))
+    return [(post_id, lookup[post_id]) for post_id in ranked]
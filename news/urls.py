@@ -1,35 +1,56 @@
 from django.urls import path
+from . import ranking
+from .http_cache import ad_tags, cache_response, news_detail_tags, news_list_tags, slot_tags
 from .views import (
     AdvertisementCreateView,
     AdvertisementDetailView,
     AdvertisementListView,
+    serve_ad,
+    track_ad_impression,
+    track_ad_click,
+    ad_stats,
     NewsPostListView,
     NewsPostDetailView,
+    NewsPostCommentListView,
+    export_news,
     set_top_news,
     list_top_news,
     set_trending_news,
     list_trending_news,
+    reorder_top_news,
+    reorder_trending_news,
     AdminSignupView,
     AdminLoginView,
     AdminListView,
     DeleteAdminView,
     track_blog_visit,
+    get_visit_stats,
     admin_dashboard_stats,
-    fetch_news_view
+    fetch_news_view,
+    fetch_job_status
 )
 
 
 urlpatterns = [
-    path('news/', NewsPostListView.as_view(), name='news-list'),
-    path('news/<uuid:id>/', NewsPostDetailView.as_view(), name='news-detail'),
+    path('news/', cache_response(news_list_tags, tag_results=True)(NewsPostListView.as_view()), name='news-list'),
+    path('news/export/', export_news, name='news-export'),
+    path('news/<uuid:id>/', cache_response(news_detail_tags)(NewsPostDetailView.as_view()), name='news-detail'),
+    path('news/<uuid:id>/comments/', cache_response(news_detail_tags)(NewsPostCommentListView.as_view()), name='news-comments'),
     path('top-news/set/', set_top_news),
-    path('top-news/', list_top_news),
+    path('top-news/', cache_response(slot_tags(ranking.TOP_NEWS), tag_results=True)(list_top_news)),
     path('trending-news/set/', set_trending_news),
-    path('trending-news/', list_trending_news),
+    path('trending-news/', cache_response(slot_tags(ranking.TRENDING), tag_results=True)(list_trending_news)),
+    path('top-news/reorder/', reorder_top_news, name='top-news-reorder'),
+    path('trending-news/reorder/', reorder_trending_news, name='trending-news-reorder'),
 
-    path('ads/', AdvertisementListView.as_view(), name='ads-list'),
+    path('ads/', cache_response(ad_tags)(AdvertisementListView.as_view()), name='ads-list'),
+    path('ads/serve/', serve_ad, name='ads-serve'),
     path('ads/create/', AdvertisementCreateView.as_view(), name='ads-create'),
     path('ads/<int:id>/', AdvertisementDetailView.as_view(), name='ad-detail'),
+    path('ads/<int:id>/impression/', track_ad_impression, name='ad-impression'),
+    path('ads/<int:id>/click/', track_ad_click, name='ad-click'),
+    path('ads/<int:id>/stats/', ad_stats, name='ad-stats'),
+    path('ads/stats/', ad_stats, name='ads-stats'),
 
     # Admin (Manager + Employee) Management
     path('admin/signup/', AdminSignupView.as_view(), name='admin-signup'),
@@ -38,7 +59,9 @@ urlpatterns = [
     path('admin/delete/<uuid:id>/', DeleteAdminView.as_view(), name='admin-delete'),
     
     path('blogs/<uuid:post_id>/visit/', track_blog_visit),
+    path('blogs/<uuid:post_id>/stats/', get_visit_stats, name='visit-stats'),
     
     path("admin/stats/", admin_dashboard_stats, name="dashboard-stats"),
     path('api/fetch-news/', fetch_news_view, name='fetch-news'),
+    path('api/fetch-news/<uuid:job_id>/', fetch_job_status, name='fetch-job-status'),
 ]
@@ -1,51 +1,82 @@
-from .serializers import AdminAccountSerializer, AdvertisementSerializer, CustomUserSerializer, NewsPostSerializer, CommentSerializer
-
-from .models import AdminAccount, Advertisement, CustomUser, NewsPost,NewsPost, Advertisement
+from .serializers import AdminAccountSerializer, AdvertisementSerializer, CustomUserSerializer, NewsPostSerializer, NewsPostListSerializer, CommentSerializer, FetchJobSerializer
+
+from .models import AdminAccount, Advertisement, Comment, CustomUser, FetchJob, NewsPost,NewsPost, Advertisement
+from . import listings, ranking
+from .ads import AD_SPACES, ad_cache
+from .ad_stats import ad_report, record_ad_event
+from .comments import COMMENT_IMPORT_LIMIT, add_comment, import_comments
+from .export import EXPORT_FORMATS, export_lines, export_queryset
+from .jobs import enqueue_fetch_job
+from .pagination import KeysetPagination
+from .constants import normalize_category
+from .search import search_posts
+from .visits import record_visit, visits_between
+from .stats import get_counters, get_site_visitors
 from rest_framework.response import Response
 from rest_framework import status,generics
-from django.db.models import Sum
+from rest_framework.exceptions import NotFound, ValidationError
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
-from django.db import transaction
 from rest_framework.permissions import BasePermission,IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.hashers import check_password
 from .serializers import LoginSerializer
 from rest_framework.response import Response
-from django.utils.timezone import now
-from datetime import timedelta
+from django.utils.dateparse import parse_date
+from datetime import datetime, timedelta
 
 import traceback
 import logging
+import uuid
 
-from django.core.management import call_command
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
 
 
+def sparse_params(request):
+    """Parses ``?fields=a,b`` and ``?expand=comments`` into two lists."""
+    def split(name):
+        value = request.query_params.get(name) or ""
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return split("fields"), split("expand")
+
+
 # ✅ List all posts, with optional search, category, date filtering
 class NewsPostListView(generics.ListCreateAPIView):
     serializer_class = NewsPostSerializer
-    queryset = NewsPost.objects.all().order_by("-date", "-time")
+    queryset = NewsPost.objects.order_by("-date", "-time", "id")
+    pagination_class = KeysetPagination
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method != "GET":
+            return super().get_serializer(*args, **kwargs)
+        fields, expand = sparse_params(self.request)
+        kwargs.setdefault("context", self.get_serializer_context())
+        return NewsPostListSerializer(*args, fields=fields, expand=expand, **kwargs)
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.request.method == "GET":
+            queryset = queryset.for_listing(expand=sparse_params(self.request)[1])
 
         category = self.request.query_params.get("category")
         date = self.request.query_params.get("date")
         search = self.request.query_params.get("search")
 
         if category and category != "All":
-            queryset = queryset.filter(main_category__iexact=category)
+            # Stored categories are canonical, so an exact (indexable) match works.
+            queryset = queryset.filter(main_category=normalize_category(category) or category)
         if date:
             queryset = queryset.filter(date=date)
         if search:
-            queryset = queryset.filter(header__icontains=search)
+            # Ranked full-text match on header and content; pages by rank.
+            queryset = search_posts(queryset, search)
+            self.keyset_ordering = ("-rank", "id")
 
         return queryset
 
@@ -55,6 +86,57 @@ class NewsPostDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = NewsPostSerializer
     lookup_field = 'id'
 
+    # ✅ Comments are paged from news/<id>/comments/; embed them only on request
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("expand", sparse_params(self.request)[1])
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if "comments" in sparse_params(self.request)[1]:
+            queryset = queryset.with_comments()
+        return queryset
+
+
+# ✅ Comments of one post, newest first, cursor-paginated
+class NewsPostCommentListView(generics.ListAPIView):
+    serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        post_id = self.kwargs["id"]
+        if not NewsPost.objects.filter(pk=post_id).exists():
+            raise NotFound("News Post Not Found")
+        return Comment.objects.filter(news_posts=post_id)
+
+
+# ✅ Streaming export: ?output=ndjson|csv&category=&start=YYYY-MM-DD&end=YYYY-MM-DD
+# (``output`` rather than ``format``, which DRF reserves for renderer selection)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_news(request):
+    output = request.query_params.get('output', 'ndjson')
+    if output not in EXPORT_FORMATS:
+        return Response({'error': f"output must be one of {', '.join(sorted(EXPORT_FORMATS))}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.query_params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:  # well formed but impossible, e.g. 2024-02-30
+                dates[name] = None
+            if dates[name] is None:
+                return Response({'error': f'{name} must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    content_type, extension = EXPORT_FORMATS[output]
+    queryset = export_queryset(request.query_params.get('category'), **dates)
+    response = StreamingHttpResponse(export_lines(queryset, output), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="news-export.{extension}"'
+    return response
+
 
 # ✅ Comment creation
 class CommentCreateView(generics.CreateAPIView):
@@ -66,42 +148,55 @@ class CommentCreateView(generics.CreateAPIView):
         data['time'] = timezone.now().time()
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        comment = serializer.save()
 
-        post = get_object_or_404(NewsPost, id=data.get('news_post_id'))
-        post.comments.add(comment)
+        try:
+            comment = add_comment(data.get('news_post_id'), serializer.validated_data)
+        except NewsPost.DoesNotExist:
+            return Response({'error': 'News Post Not Found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(self.get_serializer(comment).data, status=status.HTTP_201_CREATED)
+
+
+# ✅ Bulk comment import (archives): {"comments": [{"news_post_id": ..., "name": ..., ...}]}
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_comments_view(request):
+    rows = request.data.get('comments')
+    if not isinstance(rows, list) or not rows:
+        return Response({'error': 'comments must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > COMMENT_IMPORT_LIMIT:
+        return Response({'error': f'At most {COMMENT_IMPORT_LIMIT} comments per request'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    now = timezone.now()
+    serializer = CommentSerializer(data=[
+        {'date': now.date(), 'time': now.time(), **row} if isinstance(row, dict) else row
+        for row in rows
+    ], many=True)
+    if not serializer.is_valid():
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        comments = import_comments([
+            (row.get('news_post_id'), fields) for row, fields in zip(rows, serializer.validated_data)
+        ])
+    except NewsPost.DoesNotExist as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response({'message': 'Comments imported', 'created': len(comments)}, status=status.HTTP_201_CREATED)
 
 
-# ✅ Top News assignment
-@transaction.atomic
+# ✅ Top News assignment (set-based, see news/ranking.py)
 def assign_top_news(news_post, priority):
-    if not (1 <= priority <= 20):
-        raise ValueError("Priority must be between 1 and 20.")
-
-    # Fetch all top news ordered by priority
-    top_news = NewsPost.objects.filter(is_top_news=True).exclude(pk=news_post.pk).order_by('top_news_priority')
-
-    # Shift priorities if there's a conflict
-    priorities_to_shift = top_news.filter(top_news_priority__gte=priority)
-    for post in reversed(priorities_to_shift):
-        if post.top_news_priority >= 20:
-            post.is_top_news = False
-            post.top_news_priority = None
-        else:
-            post.top_news_priority += 1
-        post.save()
-
-    # Assign new priority to target post
-    news_post.is_top_news = True
-    news_post.top_news_priority = priority
-    news_post.save()
+    ranking.assign(ranking.TOP_NEWS, news_post, priority)
 
 @api_view(['GET'])
 def list_top_news(request):
-    top_news = NewsPost.objects.filter(is_top_news=True).order_by('top_news_priority')
-    serializer = NewsPostSerializer(top_news, many=True)
+    fields, expand = sparse_params(request)
+    if not (fields or expand):
+        return listings.listing_response(request, ranking.TOP_NEWS)
+    top_news = NewsPost.objects.for_listing(expand).top_news()
+    serializer = NewsPostListSerializer(top_news, many=True, fields=fields, expand=expand)
     return Response(serializer.data)
 
 
@@ -122,48 +217,19 @@ def set_top_news(request):
 
 # ✅ Auto-assign top news (optional)
 def auto_assign_top_news(news_post):
-    existing_priorities = list(
-        NewsPost.objects.filter(is_top_news=True).values_list('top_news_priority', flat=True)
-    )
-    available_priorities = [i for i in range(1, 21) if i not in existing_priorities]
-
-    if not available_priorities:
-        lowest = NewsPost.objects.filter(is_top_news=True).order_by('-top_news_priority').first()
-        lowest.is_top_news = False
-        lowest.top_news_priority = None
-        lowest.save()
-        available_priorities = [20]
-
-    assign_top_news(news_post, min(available_priorities))
- 
-    
-@transaction.atomic
+    ranking.auto_assign(ranking.TOP_NEWS, news_post)
+
+
 def assign_trending_news(news_post, priority):
-    if not (1 <= priority <= 30):
-        raise ValueError("Priority must be between 1 and 30.")
-
-    # Fetch all trending news ordered by priority
-    trending_news = NewsPost.objects.filter(is_trending=True).exclude(pk=news_post.pk).order_by('trending_priority')
-
-    # Shift priorities if conflict
-    priorities_to_shift = trending_news.filter(trending_priority__gte=priority)
-    for post in reversed(priorities_to_shift):
-        if post.trending_priority >= 30:
-            post.is_trending = False
-            post.trending_priority = None
-        else:
-            post.trending_priority += 1
-        post.save()
-
-    # Assign priority to target post
-    news_post.is_trending = True
-    news_post.trending_priority = priority
-    news_post.save()
+    ranking.assign(ranking.TRENDING, news_post, priority)
 
 @api_view(['GET'])
 def list_trending_news(request):
-    trending_news = NewsPost.objects.filter(is_trending=True).order_by('trending_priority')
-    serializer = NewsPostSerializer(trending_news, many=True)
+    fields, expand = sparse_params(request)
+    if not (fields or expand):
+        return listings.listing_response(request, ranking.TRENDING)
+    trending_news = NewsPost.objects.for_listing(expand).trending()
+    serializer = NewsPostListSerializer(trending_news, many=True, fields=fields, expand=expand)
     return Response(serializer.data)
 
 
@@ -182,34 +248,68 @@ def set_trending_news(request):
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 def auto_assign_trending_news(news_post):
-    existing_priorities = list(
-        NewsPost.objects.filter(is_trending=True).values_list('trending_priority', flat=True)
-    )
-    available_priorities = [i for i in range(1, 31) if i not in existing_priorities]
+    ranking.auto_assign(ranking.TRENDING, news_post)
+
+
+def reorder_slots(request, slots):
+    ids = request.data.get('ids')
+    if not isinstance(ids, list):
+        return Response({'error': 'ids must be a list of news post IDs'}, status=status.HTTP_400_BAD_REQUEST)
 
-    if not available_priorities:
-        # Remove lowest priority if full
-        lowest = NewsPost.objects.filter(is_trending=True).order_by('-trending_priority').first()
-        lowest.is_trending = False
-        lowest.trending_priority = None
-        lowest.save()
-        available_priorities = [30]
+    try:
+        ranking.reorder(slots, [uuid.UUID(str(pk)) for pk in ids])
+    except NewsPost.DoesNotExist as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    assign_trending_news(news_post, min(available_priorities))
+    ordering = slots.members().order_by(slots.priority).values('id', 'header', slots.priority)
+    return Response([
+        {'id': row['id'], 'header': row['header'], 'priority': row[slots.priority]}
+        for row in ordering
+    ])
+
+
+# ✅ Bulk reorder: send the complete ordered list of IDs for the slot set
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reorder_top_news(request):
+    return reorder_slots(request, ranking.TOP_NEWS)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def reorder_trending_news(request):
+    return reorder_slots(request, ranking.TRENDING)
 
 class AdvertisementListView(generics.ListAPIView):
     serializer_class = AdvertisementSerializer
 
-    def get_queryset(self):
-        queryset = Advertisement.objects.filter(is_active=True)
-        ad_space = self.request.query_params.get('space')
-        today = timezone.now().date()
-        queryset = queryset.filter(start_date__lte=today, end_date__gte=today)
+    # ✅ Served from the in-memory snapshot of live ads (see news/ads.py)
+    def list(self, request, *args, **kwargs):
+        ad_space = request.query_params.get('space') or None
+        if ad_space and ad_space not in AD_SPACES:
+            return Response({'error': 'Unknown ad space'}, status=status.HTTP_400_BAD_REQUEST)
+        category = request.query_params.get('category')
+        if category and not normalize_category(category):
+            return Response([])
+        return Response(ad_cache.get(ad_space).for_category(normalize_category(category)))
 
-        if ad_space:
-            queryset = queryset.filter(ad_space=ad_space)
 
-        return queryset.order_by('created_at')
+# ✅ Pick one ad for a slot by weighted rotation
+@api_view(['GET'])
+def serve_ad(request):
+    ad_space = request.query_params.get('space')
+    if not ad_space:
+        return Response({'error': 'space is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if ad_space not in AD_SPACES:
+        return Response({'error': 'Unknown ad space'}, status=status.HTTP_400_BAD_REQUEST)
+
+    category = normalize_category(request.query_params.get('category'))
+    ad = ad_cache.get(ad_space).choose(category)
+    if ad is None:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(ad)
 
 class AdvertisementCreateView(generics.CreateAPIView):
     queryset = Advertisement.objects.all()
@@ -334,23 +434,72 @@ class DeleteAdminView(generics.DestroyAPIView):
     def get_queryset(self):
         return AdminAccount.objects.filter(user_type='admin')
 
+def visit_window(request, default_days=None):
+    """
+    Reads an optional ``?start=YYYY-MM-DD&end=YYYY-MM-DD`` (end inclusive) or
+    ``?days=N`` window. Returns ``(start, end)`` datetimes, or ``None`` when
+    neither is given and there is no ``default_days``. A ``start``/``end``
+    that is not a real date, or a ``days`` that is not a whole number of at
+    least 1, is a 400.
+    """
+    def query_date(name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:  # well formed but impossible, e.g. 2024-02-30
+            day = None
+        if day is None:
+            raise ValidationError({name: "Must be a date in YYYY-MM-DD format."})
+        return day
+
+    start = query_date("start")
+    end = query_date("end")
+    days = request.query_params.get("days")
+    today = timezone.localdate()
+
+    if days:
+        if not days.isdigit() or int(days) < 1:
+            raise ValidationError({"days": "Must be a whole number of days, 1 or more."})
+        start, end = today - timedelta(days=int(days) - 1), today
+    if not (start or end):
+        if not default_days:
+            return None
+        start = today - timedelta(days=default_days - 1)
+    start = start or today - timedelta(days=29)
+    end = end or today
+
+    def midnight(day):
+        return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return midnight(start), midnight(end + timedelta(days=1))
+
+
+def window_payload(window, post_id=None):
+    if window is None:
+        return {}
+    start, end = window
+    return {
+        "windowStart": start.date(),
+        "windowEnd": (end - timedelta(days=1)).date(),
+        "windowVisitors": visits_between(start, end, post_id),
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_visit_stats(request, post_id):
     try:
-        post = NewsPost.objects.get(id=post_id)
-        total_posts = NewsPost.objects.count()
-        edited_posts = NewsPost.objects.exclude(updated_by_employee=None).count()
-        total_ads = Advertisement.objects.count()
-        active_ads = Advertisement.objects.filter(is_active=True).count()
+        post = NewsPost.objects.only('id').get(id=post_id)
+
+        now = timezone.now()
+        today_start = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
 
         return Response({
-            "totalPosts": total_posts,
-            "editedPosts": edited_posts,
-            "totalAds": total_ads,
-            "activeAds": active_ads,
-            'daily_visitors': post.daily_visitors,
-            'monthly_visitors': post.monthly_visitors
+            **get_counters(),
+            'daily_visitors': visits_between(today_start, now, post.id),
+            'monthly_visitors': visits_between(today_start.replace(day=1), now, post.id),
+            **window_payload(visit_window(request), post.id),
         })
     except NewsPost.DoesNotExist:
         return Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -359,54 +508,73 @@ def get_visit_stats(request, post_id):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def admin_dashboard_stats(request):
-    total_posts = NewsPost.objects.count()
-    edited_posts = NewsPost.objects.exclude(updated_by_employee=None).count()
-    total_ads = Advertisement.objects.count()
-    active_ads = Advertisement.objects.filter(is_active=True).count()
-
-    today = timezone.now().date()
-    one_month_ago = today - timedelta(days=30)
-
-    daily_visitors = NewsPost.objects.filter(last_visited=today).aggregate(
-        total=Sum("daily_visitors")
-    )["total"] or 0
-
-    monthly_visitors = NewsPost.objects.filter(last_visited__gte=one_month_ago).aggregate(
-        total=Sum("monthly_visitors")
-    )["total"] or 0
-
+    # Counters and visitor totals are both cached for STATS_CACHE_TTL seconds
+    # (see news/stats.py); only an explicit window hits the buckets directly.
     return Response({
-        "totalPosts": total_posts,
-        "editedPosts": edited_posts,
-        "totalAds": total_ads,
-        "activeAds": active_ads,
-        "dailyVisitors": daily_visitors,
-        "monthlyVisitors": monthly_visitors
+        **get_counters(),
+        **get_site_visitors(),
+        **window_payload(visit_window(request)),
     })
 
     
 
+# ✅ Visits are buffered in-process and flushed in batches (see news/visits.py)
 @api_view(["POST"])
 def track_blog_visit(request, post_id):
-    try:
-        post = NewsPost.objects.get(id=post_id)
-        post.update_visit_counts()  # Make sure this method exists in your model
-        return Response({
-            "message": "Visit recorded",
-            "daily_visitors": post.daily_visitors,
-            "monthly_visitors": post.monthly_visitors
-        })
-    except NewsPost.DoesNotExist:
+    counts = record_visit(post_id)
+    if counts is None:
         return Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    daily_visitors, monthly_visitors = counts
+    return Response({
+        "message": "Visit recorded",
+        "daily_visitors": daily_visitors,
+        "monthly_visitors": monthly_visitors
+    })
+
+
+
+# ✅ Ad impressions/clicks are buffered like visits (see news/ad_stats.py)
+@api_view(["POST"])
+def track_ad_impression(request, id):
+    record_ad_event(id, 'impressions')
+    return Response({"message": "Impression recorded"}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["POST"])
+def track_ad_click(request, id):
+    record_ad_event(id, 'clicks')
+    return Response({"message": "Click recorded"}, status=status.HTTP_202_ACCEPTED)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ad_stats(request, id=None):
+    if id is not None and not Advertisement.objects.filter(pk=id).exists():
+        return Response({"error": "Ad not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    start, end = visit_window(request, default_days=7)
+    return Response({
+        "windowStart": start.date(),
+        "windowEnd": (end - timedelta(days=1)).date(),
+        **ad_report(start, end, id),
+    })
+
+
+# ✅ Fetching runs in the process_fetch_jobs worker; this only enqueues.
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])  # Optional: protect with auth
 def fetch_news_view(request):
     try:
-        call_command('fetch_news')
-        return JsonResponse({'status': 'success', 'message': 'News fetched successfully'})
+        job = enqueue_fetch_job(request.user)
+        return JsonResponse({'status': 'queued', 'job_id': str(job.id)}, status=202)
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def fetch_job_status(request, job_id):
+    job = get_object_or_404(FetchJob, id=job_id)
+    return Response(FetchJobSerializer(job).data)
@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from .buffers import ShardedCounter, increment_or_create
+from .models import NewsPost, PostVisitBucket
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def increment_bucket(post_id, bucket, visits):
+    # post_id=None filters on IS NULL, i.e. the site-wide rollup row.
+    increment_or_create(PostVisitBucket, {'post_id': post_id, 'bucket': bucket}, {'count': visits})
+
+
+def flush_visits(counts):
+    """
+    Applies buffered ``{(post_id, hour): visits}``.
+
+    Each post's hourly bucket and the site-wide rollup for that hour are
+    incremented, and the post's day/month counters get a counter-only UPDATE.
+    """
+    live = set(NewsPost.objects.filter(pk__in={post_id for post_id, _ in counts}).values_list('pk', flat=True))
+    per_day = defaultdict(int)
+    site = defaultdict(int)
+
+    with transaction.atomic():
+        for (post_id, bucket), visits in counts.items():
+            if post_id not in live:
+                continue
+            increment_bucket(post_id, bucket, visits)
+            per_day[post_id, timezone.localtime(bucket).date()] += visits
+            site[bucket] += visits
+
+        for bucket, visits in site.items():
+            increment_bucket(None, bucket, visits)
+
+        for (post_id, day), visits in sorted(per_day.items(), key=lambda item: item[0][1]):
+            month_start = day.replace(day=1)
+            NewsPost.objects.filter(pk=post_id).update(
+                daily_visitors=Case(
+                    When(last_visited=day, then=F('daily_visitors') + visits),
+                    default=Value(visits),
+                ),
+                monthly_visitors=Case(
+                    When(Q(last_visited__gte=month_start) | Q(last_visited__isnull=True),
+                         then=F('monthly_visitors') + visits),
+                    default=Value(visits),
+                ),
+                last_visited=day,
+            )
+
+
+visit_counter = ShardedCounter(flush_visits, interval=getattr(settings, 'VISIT_FLUSH_INTERVAL', 5))
+
+
+def record_visit(post_id):
+    """
+    Buffers one visit and returns ``(daily_visitors, monthly_visitors)`` as
+    they will read once the buffer is flushed, or ``None`` for a missing post.
+    """
+    row = NewsPost.objects.filter(pk=post_id).values(
+        'daily_visitors', 'monthly_visitors', 'last_visited'
+    ).first()
+    if row is None:
+        return None
+
+    now = timezone.now()
+    today = timezone.localtime(now).date()
+    pending = visit_counter.add((post_id, hour_bucket(now)))
+    last_visited = row['last_visited']
+
+    daily = pending + (row['daily_visitors'] if last_visited == today else 0)
+    if last_visited is None or last_visited >= today.replace(day=1):
+        monthly = pending + row['monthly_visitors']
+    else:
+        monthly = pending
+    return daily, monthly
+
+
+def visits_between(start, end, post_id=None):
+    """Total visits in ``[start, end)``, read from the hourly buckets."""
+    filters = {'post_id': post_id} if post_id else {'post__isnull': True}
+    return PostVisitBucket.objects.filter(
+        bucket__gte=hour_bucket(start), bucket__lt=end, **filters
+    ).aggregate(total=Sum('count'))['total'] or 0
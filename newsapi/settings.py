@@ -92,6 +92,23 @@ DATABASES = {
     'default': dj_database_url.config(default=os.environ.get('DATABASE_URL'))
 }
 
+# Shared cache for response/listing caches and invalidation versions. Use
+# Redis in production so every worker sees the same versions; local memory
+# is enough for development and tests.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_USER_MODEL = 'news.CustomUser'
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -151,6 +168,23 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Seconds between write-behind flushes of buffered visit counts
+VISIT_FLUSH_INTERVAL = 5
+
+# Seconds between flushes of buffered ad impressions/clicks
+AD_STATS_FLUSH_INTERVAL = 5
+
+# Seconds the admin dashboard counters are cached between signal invalidations
+STATS_CACHE_TTL = 10
+
+# Upper bound on how long a materialized top/trending body is kept; edits
+# invalidate it immediately through a version bump
+LISTING_CACHE_TTL = 60 * 60 * 24
+
+# Upper bound on how long a cached public GET response is kept; model signals
+# invalidate it earlier through its tags
+HTTP_CACHE_TTL = 300
+
 DJOSER = {
     "USER_ID_FIELD": "id",
     "LOGIN_FIELD": "email",
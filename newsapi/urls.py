@@ -18,13 +18,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from news.view.custom_auth import CustomTokenLoginView
-from news.views import CommentCreateView, NewsPostDetailView, NewsPostListView
+from news.views import CommentCreateView, NewsPostDetailView, NewsPostListView, import_comments_view
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('news.urls')),
      path("api/comments/", CommentCreateView.as_view(), name="create-comment"),
+     path("api/comments/import/", import_comments_view, name="import-comments"),
       path('api/news/<str:id>/', NewsPostDetailView.as_view(), name='news-detail'),
     
      # Auth endpoints